@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -33,6 +35,13 @@ assert any(app in INSTALLED_APPS for app in ['posts.apps.PostsConfig', 'posts'])
     'Пожалуйста зарегистрируйте приложение в `settings.INSTALLED_APPS`'
 )
 
+
+@pytest.fixture(autouse=True)
+def spool_root(settings, tmp_path):
+    """Очереди SPOOL_ROOT пишутся во временный каталог, а не в проект."""
+    settings.SPOOL_ROOT = str(tmp_path / 'spool')
+
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
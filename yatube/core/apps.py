@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
+from PIL import Image
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import auth, db  # noqa: F401
+        from .metrics import instrument_templates
+
+        instrument_templates()
+
+        # Pillow откажется открывать картинку, которая вдвое больше лимита,
+        # ещё до декодирования — в том числе при генерации миниатюр.
+        Image.MAX_IMAGE_PIXELS = settings.IMAGE_UPLOAD_MAX_PIXELS
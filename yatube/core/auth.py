@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model)
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.core.cache import caches
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+
+USER_KEY = 'auth:user:{}'
+# В кеш попадают только эти поля: ни хеша пароля, ни почты. Остальные
+# у восстановленного пользователя отложены и читаются из базы по
+# обращению, а save() записывает только загруженные поля.
+USER_CACHE_FIELDS = (
+    'id', 'username', 'first_name', 'last_name',
+    'is_active', 'is_staff', 'is_superuser',
+)
+
+
+def user_cache():
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def get_cached_user(request):
+    """auth.get_user, который берёт пользователя из общего кеша.
+
+    Из базы пользователь читается только при промахе. Проверки
+    auth.get_user повторяются и для закешированного пользователя:
+    бэкенд из сессии должен быть разрешён, а хеш сессии — совпадать
+    с сохранённым в сессии, иначе сессия сбрасывается.
+    """
+    try:
+        user_id = get_user_model()._meta.pk.to_python(
+            request.session[SESSION_KEY]
+        )
+    except KeyError:
+        return AnonymousUser()
+    key = USER_KEY.format(user_id)
+    cached = user_cache().get(key)
+    if cached is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            user_cache().set(key, {
+                'fields': {
+                    name: getattr(user, name) for name in USER_CACHE_FIELDS
+                },
+                'session_hash': user.get_session_auth_hash(),
+            }, settings.USER_CACHE_SECONDS)
+        return user
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if (request.session.get(BACKEND_SESSION_KEY)
+            not in settings.AUTHENTICATION_BACKENDS
+            or not session_hash
+            or not constant_time_compare(
+                session_hash, cached['session_hash'])):
+        request.session.flush()
+        return AnonymousUser()
+    model = get_user_model()
+    # from_db ждёт значения в порядке полей модели.
+    names = [
+        field.attname for field in model._meta.concrete_fields
+        if field.attname in cached['fields']
+    ]
+    return model.from_db(
+        router.db_for_read(model),
+        names,
+        [cached['fields'][name] for name in names],
+    )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user(sender, instance, **kwargs):
+    """Любое изменение пользователя, включая смену пароля и last_login."""
+    user_cache().delete(USER_KEY.format(instance.pk))
+
+
+@receiver(user_logged_in)
+@receiver(user_logged_out)
+def invalidate_on_login(sender, request, user, **kwargs):
+    if user is not None:
+        user_cache().delete(USER_KEY.format(user.pk))
@@ -0,0 +1,40 @@
+import os
+import re
+
+from django.core.cache.backends import filebased, locmem
+
+from .metrics import increment
+
+# Метка кеша — начало ключа: throttle, views, sorl-thumbnail и т. п.
+KEY_PREFIX = re.compile(r'^[\w-]*?(?=[:.|]|$)')
+MISSING = object()
+
+
+class CacheMetricsMixin:
+    """Считает попадания и промахи чтений по префиксу ключа."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version)
+        increment(
+            'yatube_cache_requests_total',
+            prefix=KEY_PREFIX.match(str(key)).group() or 'other',
+            result='miss' if value is MISSING else 'hit',
+        )
+        return default if value is MISSING else value
+
+
+class LocMemCache(CacheMetricsMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(CacheMetricsMixin, filebased.FileBasedCache):
+    """Файловый кеш в закрытом каталоге.
+
+    Записи — pickle, и FileBasedCache распаковывает всё, что найдёт
+    в каталоге, поэтому доступ к нему должен быть только у приложения.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        os.makedirs(self._dir, 0o700, exist_ok=True)
+        os.chmod(self._dir, 0o700)
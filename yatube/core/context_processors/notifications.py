@@ -0,0 +1,9 @@
+from posts.notifications import unread_count
+
+
+def unread_notifications(request):
+    """Число непрочитанных уведомлений для шапки."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'unread_notifications': unread_count(user)}
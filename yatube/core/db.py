@@ -0,0 +1,15 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Выполняет прагмы из DATABASES[...]['PRAGMAS'] на новом соединении."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get('PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,102 @@
+from contextlib import ExitStack
+
+from core.auth import USER_KEY, user_cache
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Group, Post
+
+User = get_user_model()
+
+UNCACHED = {
+    'MIDDLEWARE': [
+        'django.contrib.auth.middleware.AuthenticationMiddleware'
+        if name == 'core.middleware.CachedAuthenticationMiddleware'
+        else name
+        for name in settings.MIDDLEWARE
+    ],
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Считает запросы к базе на страницах posts для вошедшего '
+        'пользователя без кеша пользователя и сессий и с ним.'
+    )
+
+    def handle(self, *args, **options):
+        # Данные для страниц создаются в транзакции и откатываются.
+        with transaction.atomic():
+            user = User.objects.create_user(username='bench_auth_queries')
+            group = Group.objects.create(
+                title='Бенчмарк', slug='bench-auth-queries'
+            )
+            post = Post.objects.create(author=user, group=group, text='Пост')
+            urls = {
+                'posts:index': reverse('posts:index'),
+                'posts:group_list': reverse(
+                    'posts:group_list', kwargs={'slug': group.slug}
+                ),
+                'posts:profile': reverse(
+                    'posts:profile', kwargs={'username': user.username}
+                ),
+                'posts:post_detail': reverse(
+                    'posts:post_detail', kwargs={'post_id': post.id}
+                ),
+                'posts:post_create': reverse('posts:post_create'),
+                'posts:post_edit': reverse(
+                    'posts:post_edit', kwargs={'post_id': post.id}
+                ),
+                'posts:follow_index': reverse('posts:follow_index'),
+            }
+            with override_settings(**UNCACHED):
+                before = self.count_queries(user, urls)
+            after = self.count_queries(user, urls)
+            user_cache().delete(USER_KEY.format(user.pk))
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f'{"страница":<22}{"без кеша":>10}{"с кешем":>10}'
+            f'{"экономия":>10}'
+        )
+        for name in urls:
+            if before[name] is None or after[name] is None:
+                self.stdout.write(f'{name:<22}{"страница упала":>30}')
+                continue
+            self.stdout.write(
+                f'{name:<22}{before[name]:>10}{after[name]:>10}'
+                f'{before[name] - after[name]:>10}'
+            )
+        total_before = sum(filter(None, before.values()))
+        total_after = sum(filter(None, after.values()))
+        self.stdout.write(
+            f'{"всего":<22}{total_before:>10}{total_after:>10}'
+            f'{total_before - total_after:>10}'
+        )
+
+    def count_queries(self, user, urls):
+        """Запросы второго обращения к каждой странице: кеш уже прогрет."""
+        # Адрес не из INTERNAL_IPS, чтобы не включалась debug toolbar.
+        client = Client(REMOTE_ADDR='10.0.0.1')
+        client.force_login(user)
+        counts = {}
+        for name, url in urls.items():
+            try:
+                client.get(url)
+                with ExitStack() as stack:
+                    contexts = [
+                        stack.enter_context(CaptureQueriesContext(connection))
+                        for connection in connections.all()
+                    ]
+                    client.get(url)
+            except Exception:
+                counts[name] = None
+                continue
+            counts[name] = sum(len(context) for context in contexts)
+        client.logout()
+        return counts
@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SCHEMA = (
+    'CREATE TABLE comment ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+    'post_id INTEGER NOT NULL, text TEXT NOT NULL, created REAL NOT NULL)'
+)
+
+
+def connect(path, pragmas):
+    connection = sqlite3.connect(path)
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+    return connection
+
+
+def run_writer(path, pragmas, persistent, seconds):
+    """Имитирует воркер, который добавляет комментарии.
+
+    Каждый «запрос» читает пост и вставляет одну строку в своей
+    транзакции, как add_comment. Без постоянных соединений соединение
+    открывается заново на каждый запрос, как при CONN_MAX_AGE=0.
+    """
+    writes = errors = 0
+    connection = None
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if connection is None:
+            connection = connect(path, pragmas)
+        try:
+            with connection:
+                connection.execute(
+                    'SELECT count(*) FROM comment WHERE post_id = ?', (1,)
+                ).fetchone()
+                connection.execute(
+                    'INSERT INTO comment (post_id, text, created) '
+                    'VALUES (?, ?, ?)',
+                    (1, 'x' * 200, time.time()),
+                )
+            writes += 1
+        except sqlite3.OperationalError:
+            errors += 1
+        if not persistent:
+            connection.close()
+            connection = None
+    return writes, errors
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность записи в SQLite '
+        'с настройками по умолчанию и с продакшен-профилем.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5)
+
+    def handle(self, *args, **options):
+        profiles = (
+            ('default', {}, False),
+            ('production', settings.SQLITE_PRODUCTION_PRAGMAS, True),
+        )
+        self.stdout.write(
+            f'{"профиль":<12}{"записей":>10}{"в секунду":>12}'
+            f'{"ошибок блокировки":>20}'
+        )
+        for name, pragmas, persistent in profiles:
+            writes, errors = self.run_profile(pragmas, persistent, **options)
+            self.stdout.write(
+                f'{name:<12}{writes:>10}'
+                f'{writes / options["seconds"]:>12.0f}{errors:>20}'
+            )
+
+    def run_profile(self, pragmas, persistent, workers, seconds, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            with connect(path, pragmas) as connection:
+                connection.execute(SCHEMA)
+            with ProcessPoolExecutor(workers) as pool:
+                results = list(pool.map(
+                    run_writer,
+                    *zip(*[(path, pragmas, persistent, seconds)] * workers)
+                ))
+        return (
+            sum(writes for writes, _ in results),
+            sum(errors for _, errors in results),
+        )
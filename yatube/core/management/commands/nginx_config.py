@@ -0,0 +1,52 @@
+from core.static_storage import brotli
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Django добавляет к имени 12 шестнадцатеричных знаков хеша:
+# style.css -> style.5ad3f1e2c0b4.css. Такие файлы не меняются никогда,
+# остальные браузер каждый раз перепроверяет.
+CONFIG = '''\
+# Сгенерировано manage.py nginx_config; подключается в server.
+location ~ "^{url}(.+\\.[0-9a-f]{{12}}\\.\\w+)$" {{
+    alias {root}/$1;
+{compressed}    add_header Cache-Control "public, max-age=31536000, immutable";
+    add_header Vary Accept-Encoding;
+    access_log off;
+}}
+
+location {url} {{
+    alias {root}/;
+{compressed}    add_header Cache-Control "no-cache";
+    add_header Vary Accept-Encoding;
+}}
+
+# Картинки проверяет Django (MEDIA_URL проксируется в приложение),
+# а отдаёт nginx по X-Accel-Redirect; снаружи этот адрес недоступен.
+location {accel_prefix} {{
+    internal;
+    alias {media_root}/;
+}}
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает конфигурацию nginx: статику из STATIC_ROOT с заранее '
+        'сжатыми копиями и вечным кешем для файлов с хешем в имени '
+        'и internal location для картинок по X-Accel-Redirect. '
+        'Сохраняется в конфигурацию сайта.'
+    )
+
+    def handle(self, *args, **options):
+        # Готовые .gz (и .br) из collectstatic вместо сжатия на лету;
+        # brotli_static требует модуля ngx_brotli.
+        compressed = '    gzip_static on;\n'
+        if brotli is not None:
+            compressed += '    brotli_static on;\n'
+        self.stdout.write(CONFIG.format(
+            url=settings.STATIC_URL,
+            root=settings.STATIC_ROOT.rstrip('/'),
+            compressed=compressed,
+            accel_prefix=settings.MEDIA_ACCEL_PREFIX,
+            media_root=settings.MEDIA_ROOT.rstrip('/'),
+        ), ending='')
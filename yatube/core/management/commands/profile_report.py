@@ -0,0 +1,86 @@
+import glob
+import io
+import os
+import pstats
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+REPORT_DIR = '_report'
+
+
+def read_collapsed(paths):
+    stacks = Counter()
+    for path in paths:
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                stacks[stack] += int(count)
+    return stacks
+
+
+class Command(BaseCommand):
+    help = (
+        'Объединяет профили из PROFILER_DIR по страницам: пишет общие '
+        '.pstats и .collapsed (для flame graph) и печатает top-N функций.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument(
+            '--sort',
+            default='cumulative',
+            help='Порядок для .pstats: cumulative, tottime, calls...',
+        )
+        parser.add_argument('--view', help='Только эта страница, posts.index')
+
+    def handle(self, *args, **options):
+        output = os.path.join(settings.PROFILER_DIR, REPORT_DIR)
+        os.makedirs(output, exist_ok=True)
+        for entry in sorted(os.scandir(settings.PROFILER_DIR),
+                            key=lambda entry: entry.name):
+            if not entry.is_dir() or entry.name == REPORT_DIR:
+                continue
+            if options['view'] and entry.name != options['view']:
+                continue
+            self.report_pstats(entry, output, **options)
+            self.report_collapsed(entry, output, **options)
+
+    def report_pstats(self, entry, output, top, sort, **options):
+        paths = glob.glob(os.path.join(entry.path, '*.pstats'))
+        if not paths:
+            return
+        self.stdout.write(f'== {entry.name}: {len(paths)} профилей cProfile')
+        report = io.StringIO()
+        stats = pstats.Stats(*paths, stream=report)
+        stats.dump_stats(os.path.join(output, f'{entry.name}.pstats'))
+        stats.strip_dirs().sort_stats(sort).print_stats(top)
+        self.stdout.write(report.getvalue())
+
+    def report_collapsed(self, entry, output, top, **options):
+        paths = glob.glob(os.path.join(entry.path, '*.collapsed'))
+        if not paths:
+            return
+        stacks = read_collapsed(paths)
+        with open(os.path.join(output, f'{entry.name}.collapsed'), 'w',
+                  encoding='utf-8') as file:
+            for stack, count in stacks.most_common():
+                file.write(f'{stack} {count}\n')
+
+        own, total = Counter(), Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        samples = sum(stacks.values())
+        self.stdout.write(
+            f'== {entry.name}: {len(paths)} профилей, {samples} сэмплов'
+        )
+        self.stdout.write(f'{"своё":>8}{"всего":>8}  функция')
+        for frame, count in own.most_common(top):
+            self.stdout.write(
+                f'{count / samples:>8.1%}{total[frame] / samples:>8.1%}'
+                f'  {frame}'
+            )
@@ -0,0 +1,47 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Группирует журнал медленных запросов по отпечатку и выводит '
+        'самые дорогие по суммарному времени вместе с планами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10)
+
+    def handle(self, *args, **options):
+        groups = defaultdict(lambda: {
+            'count': 0, 'total': 0.0, 'max': 0.0, 'views': set(),
+        })
+        try:
+            log = open(settings.SLOW_QUERY_LOG, encoding='utf-8')
+        except FileNotFoundError:
+            raise CommandError(f'Журнал {settings.SLOW_QUERY_LOG} пуст.')
+        with log:
+            for line in log:
+                entry = json.loads(line)
+                group = groups[entry['fingerprint']]
+                group['count'] += 1
+                group['total'] += entry['duration']
+                group['max'] = max(group['max'], entry['duration'])
+                group['views'].add(entry['view'] or '-')
+                group['plan'] = entry['plan']
+
+        ranked = sorted(
+            groups.items(), key=lambda item: item[1]['total'], reverse=True
+        )
+        for sql, group in ranked[:options['top']]:
+            self.stdout.write(
+                f'{group["total"] * 1000:.1f} мс всего, '
+                f'{group["count"]} раз, '
+                f'макс. {group["max"] * 1000:.1f} мс, '
+                f'страницы: {", ".join(sorted(group["views"]))}'
+            )
+            self.stdout.write(f'  {sql}')
+            for step in group['plan']:
+                self.stdout.write(f'    {step}')
@@ -0,0 +1,26 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файл реплики. '
+        'Локальная замена настоящей репликации.'
+    )
+
+    def handle(self, *args, **options):
+        replica = settings.DATABASES.get(settings.REPLICA_DATABASE)
+        if replica is None:
+            raise CommandError(
+                'Реплика не настроена: задайте YATUBE_DB_REPLICA.'
+            )
+        source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        target = sqlite3.connect(replica['NAME'])
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        self.stdout.write(f'Реплика обновлена: {replica["NAME"]}')
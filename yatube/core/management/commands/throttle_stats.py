@@ -0,0 +1,14 @@
+from core.throttling import rejection_counts
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Показывает, сколько запросов отклонил ThrottleMiddleware.'
+
+    def handle(self, *args, **options):
+        counts = rejection_counts(settings.THROTTLE_RATES)
+        for view_name, rate in settings.THROTTLE_RATES.items():
+            self.stdout.write(
+                f'{view_name:<28}{rate:>8}{counts[view_name]:>10}'
+            )
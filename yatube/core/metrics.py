@@ -0,0 +1,333 @@
+import fcntl
+import functools
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Снимок воркера: <pid>-<время старта, нс>.json. Время старта отличает
+# новый процесс от завершившегося, если ОС выдала ему тот же pid.
+SNAPSHOT_RE = re.compile(r'^(\d+)-(\d+)\.json$')
+RETIRED = 'retired.json'
+
+# Имя метрики: (тип, описание) для строк # TYPE и # HELP.
+METRICS = {
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время ответа страницы.'
+    ),
+    'yatube_requests_total': (
+        'counter', 'Ответы по страницам и кодам.'
+    ),
+    'yatube_db_duration_seconds': (
+        'histogram', 'Суммарное время запросов к базе за один ответ.'
+    ),
+    'yatube_db_queries_total': (
+        'counter', 'Запросы к базе по страницам.'
+    ),
+    'yatube_template_render_seconds': (
+        'histogram', 'Время рендеринга шаблона страницы.'
+    ),
+    'yatube_cache_requests_total': (
+        'counter', 'Чтения из кеша: result="hit" или "miss".'
+    ),
+    'yatube_thumbnail_create_seconds': (
+        'histogram', 'Время создания миниатюры.'
+    ),
+    'yatube_throttle_rejections_total': (
+        'counter', 'Запросы, отклонённые лимитами THROTTLE_RATES.'
+    ),
+}
+
+
+class Registry:
+    """Метрики процесса: счётчики и гистограммы с метками.
+
+    Значения только растут, поэтому снимок процесса можно целиком
+    перезаписывать в METRICS_DIR/<pid>-<старт>.json, а страница
+    /metrics складывает снимки всех воркеров.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.flushed = 0
+        self.pid = self.started = None
+
+    @property
+    def filename(self):
+        # После fork у воркера свой pid, а значит и своё время старта.
+        pid = os.getpid()
+        if pid != self.pid:
+            self.pid, self.started = pid, time.time_ns()
+        return f'{self.pid}-{self.started}.json'
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] += amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        # Последняя ячейка — значения больше всех границ (+Inf).
+        index = bisect_left(settings.METRICS_BUCKETS, value)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'buckets': [0] * (len(settings.METRICS_BUCKETS) + 1),
+                    'sum': 0.0,
+                    'count': 0,
+                }
+            histogram['buckets'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [
+                    [name, labels, value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, labels, dict(histogram,
+                                        buckets=list(histogram['buckets']))]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        """Сохраняет снимок процесса, если задан METRICS_DIR.
+
+        Пишет не чаще раза в METRICS_FLUSH_INTERVAL секунд: через
+        временный файл и os.replace, чтобы /metrics не прочитал
+        недописанный JSON.
+        """
+        if not settings.METRICS_DIR:
+            return
+        now = time.monotonic()
+        if not force and now - self.flushed < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self.flushed = now
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = os.path.join(settings.METRICS_DIR, self.filename)
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(path + '.tmp', path)
+
+
+registry = Registry()
+
+
+def increment(name, amount=1, **labels):
+    registry.increment(name, amount, **labels)
+
+
+def observe(name, value, **labels):
+    registry.observe(name, value, **labels)
+
+
+@contextmanager
+def timer(name, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe(name, time.perf_counter() - start, **labels)
+
+
+def collect():
+    """Складывает снимки всех воркеров с живыми метриками процесса.
+
+    Снимки завершившихся воркеров сначала переносятся в retired.json:
+    их счётчики остаются в сумме, и она не убывает после перезапуска.
+    """
+    snapshots = [registry.snapshot()]
+    directory = settings.METRICS_DIR
+    if directory and os.path.isdir(directory):
+        retire_snapshots(directory)
+        own = registry.filename
+        for filename in os.listdir(directory):
+            if filename != own and (
+                filename == RETIRED or SNAPSHOT_RE.match(filename)
+            ):
+                snapshot = read_snapshot(os.path.join(directory, filename))
+                if snapshot is not None:
+                    snapshots.append(snapshot)
+    return merge(snapshots)
+
+
+def merge(snapshots):
+    counters = defaultdict(float)
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, histogram in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, {
+                'buckets': [0] * len(histogram['buckets']),
+                'sum': 0.0,
+                'count': 0,
+            })
+            total['buckets'] = [
+                a + b for a, b in zip(total['buckets'], histogram['buckets'])
+            ]
+            total['sum'] += histogram['sum']
+            total['count'] += histogram['count']
+    return counters, histograms
+
+
+def read_snapshot(path):
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def dead_snapshots(filenames):
+    """Снимки завершившихся воркеров среди filenames.
+
+    Из снимков с одним pid жив только последний по времени старта,
+    и то если процесс с этим pid существует.
+    """
+    by_pid = defaultdict(list)
+    for filename in filenames:
+        match = SNAPSHOT_RE.match(filename)
+        if match:
+            pid, started = map(int, match.groups())
+            by_pid[pid].append((started, filename))
+    dead = []
+    for pid, entries in by_pid.items():
+        entries.sort()
+        dead.extend(filename for _, filename in entries[:-1])
+        if not is_alive(pid):
+            dead.append(entries[-1][1])
+    return dead
+
+
+def retire_snapshots(directory):
+    """Переносит снимки завершившихся воркеров в retired.json.
+
+    Работает под файловой блокировкой, чтобы два запроса к /metrics
+    не сложили один снимок дважды.
+    """
+    with open(os.path.join(directory, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        dead = dead_snapshots(os.listdir(directory))
+        if not dead:
+            return
+        path = os.path.join(directory, RETIRED)
+        snapshots = [read_snapshot(path)] + [
+            read_snapshot(os.path.join(directory, name)) for name in dead
+        ]
+        counters, histograms = merge(
+            snapshot for snapshot in snapshots if snapshot is not None
+        )
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump({
+                'counters': [
+                    [name, labels, value]
+                    for (name, labels), value in counters.items()
+                ],
+                'histograms': [
+                    [name, labels, histogram]
+                    for (name, labels), histogram in histograms.items()
+                ],
+            }, file)
+        os.replace(path + '.tmp', path)
+        for name in dead:
+            os.remove(os.path.join(directory, name))
+
+
+def format_labels(labels):
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"')
+         .replace('\n', r'\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def render(counters, histograms):
+    """Текстовый формат Prometheus (version=0.0.4)."""
+    series = defaultdict(list)
+    for (name, labels), value in counters.items():
+        series[name].append(f'{name}{format_labels(labels)} {value:g}')
+    bounds = [f'{bound:g}' for bound in settings.METRICS_BUCKETS] + ['+Inf']
+    for (name, labels), histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(bounds, histogram['buckets']):
+            cumulative += count
+            bucket_labels = format_labels(labels + (('le', bound),))
+            series[name].append(f'{name}_bucket{bucket_labels} {cumulative}')
+        series[name].append(
+            f'{name}_sum{format_labels(labels)} {histogram["sum"]:g}'
+        )
+        series[name].append(
+            f'{name}_count{format_labels(labels)} {histogram["count"]}'
+        )
+    lines = []
+    for name in sorted(series):
+        kind, description = METRICS.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(sorted(series[name]) if kind == 'counter'
+                     else series[name])
+    return '\n'.join(lines) + '\n'
+
+
+class QueryTimer:
+    """Обёртка execute_wrapper: считает запросы и их суммарное время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+def instrument_templates():
+    """Оборачивает таймером рендеринг шаблонов DjangoTemplates.
+
+    Меряется только шаблон, который рендерит сама страница;
+    include и extends входят в его время.
+    """
+    from django.template.backends.django import Template
+
+    original = Template.render
+    if getattr(original, 'instrumented', False):
+        return
+
+    @functools.wraps(original)
+    def render(self, context=None, request=None):
+        with timer('yatube_template_render_seconds',
+                   template=self.template.name or '<string>'):
+            return original(self, context, request)
+
+    render.instrumented = True
+    Template.render = render
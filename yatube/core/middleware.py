@@ -0,0 +1,177 @@
+import math
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.functional import SimpleLazyObject
+
+from . import metrics
+from .auth import get_cached_user
+from .profiling import PROFILERS, profile_path
+from .routers import set_read_replica
+from .slow_queries import SlowQueryLogger
+from .throttling import count_rejection, take_tokens
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_COOKIE = 'read_primary'
+
+
+class ReplicaRoutingMiddleware:
+    """Отдаёт ленты из реплики, но после записи держит пользователя
+    на основной базе REPLICA_STICKY_SECONDS секунд, чтобы он сразу
+    видел свои изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            set_read_replica(False)
+        match = request.resolver_match
+        if match is not None and (
+                request.method not in SAFE_METHODS
+                or match.view_name in settings.REPLICA_STICKY_VIEWS):
+            response.set_cookie(
+                STICKY_COOKIE,
+                '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        set_read_replica(
+            request.method in SAFE_METHODS
+            and request.resolver_match.view_name in settings.REPLICA_VIEWS
+            and STICKY_COOKIE not in request.COOKIES
+        )
+
+
+class ThrottleMiddleware:
+    """Ограничивает частоту запросов к страницам из THROTTLE_RATES.
+
+    Открыть форму страницы из THROTTLE_FORM_VIEWS можно сколько
+    угодно, считаются только её отправки. Для каждого пользователя
+    и каждого IP-адреса в кеше хранится свой счётчик на окно. Сверх
+    лимита запрос отклоняется дешёвым ответом 429 без рендеринга
+    шаблонов.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        rate = settings.THROTTLE_RATES.get(view_name)
+        if rate is None or (request.method in SAFE_METHODS
+                            and view_name in settings.THROTTLE_FORM_VIEWS):
+            return None
+        identities = [f'ip:{request.META.get("REMOTE_ADDR")}']
+        if request.user.is_authenticated:
+            identities.append(f'user:{request.user.pk}')
+        wait = take_tokens(
+            [f'throttle:{view_name}:{identity}' for identity in identities],
+            rate,
+        )
+        if not wait:
+            return None
+        count_rejection(view_name)
+        response = HttpResponse(
+            'Слишком много запросов.',
+            content_type='text/plain; charset=utf-8',
+            status=429,
+        )
+        response['Retry-After'] = int(math.ceil(wait))
+        return response
+
+
+class SamplingProfilerMiddleware:
+    """Профилирует долю PROFILER_SAMPLE_RATE запросов.
+
+    Профиль каждого такого запроса сохраняется в PROFILER_DIR
+    в каталог страницы; manage.py profile_report их объединяет.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILER_SAMPLE_RATE:
+            return self.get_response(request)
+        extension, factory = PROFILERS[settings.PROFILER_MODE]
+        profiler = factory()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        match = request.resolver_match
+        view_name = match.view_name if match is not None else 'unresolved'
+        profiler.dump_stats(profile_path(view_name, extension))
+        return response
+
+
+class SlowQueryMiddleware:
+    """Включает SlowQueryLogger на всех соединениях на время запроса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.SLOW_QUERY_THRESHOLD is None:
+            return self.get_response(request)
+        slow_query_logger = SlowQueryLogger(request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(slow_query_logger)
+                )
+            return self.get_response(request)
+
+
+class MetricsMiddleware:
+    """Записывает в метрики время ответа и работы с базой по страницам."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_timer = metrics.QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(query_timer))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unresolved'
+        metrics.observe('yatube_request_duration_seconds', duration, view=view)
+        metrics.increment(
+            'yatube_requests_total', view=view, status=response.status_code
+        )
+        metrics.observe(
+            'yatube_db_duration_seconds', query_timer.duration, view=view
+        )
+        metrics.increment(
+            'yatube_db_queries_total', query_timer.count, view=view
+        )
+        metrics.registry.flush()
+        return response
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, читающий пользователя из общего кеша."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
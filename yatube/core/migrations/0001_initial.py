@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('digest', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Путь в хранилище')),
+                ('size', models.PositiveIntegerField(verbose_name='Размер, байт')),
+                ('refcount', models.PositiveIntegerField(default=0, verbose_name='Число ссылок')),
+            ],
+            options={
+                'verbose_name': 'Медиафайл',
+                'verbose_name_plural': 'Медиафайлы',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='acquired',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Последняя ссылка'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -10,3 +11,21 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class MediaBlob(CreatedModel):
+    """Файл в хранилище, адресуемый хешем содержимого."""
+    digest = models.CharField('SHA-256', max_length=64, unique=True)
+    name = models.CharField('Путь в хранилище', max_length=255, unique=True)
+    size = models.PositiveIntegerField('Размер, байт')
+    refcount = models.PositiveIntegerField('Число ссылок', default=0)
+    # Время последней новой ссылки: gc_media не трогает файлы, которые
+    # только что достались новому посту, даже если сам файл старый.
+    acquired = models.DateTimeField('Последняя ссылка', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Медиафайл'
+        verbose_name_plural = 'Медиафайлы'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,73 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+
+def frame_name(frame):
+    module = frame.f_globals.get('__name__', '?')
+    return f'{module}.{frame.f_code.co_name}'
+
+
+class StackSampler:
+    """Сэмплирующий профилировщик одного потока.
+
+    Фоновый поток раз в interval секунд снимает стек профилируемого
+    потока и считает одинаковые стеки. Результат — строки формата
+    collapsed stacks («a;b;c 12»), которые понимают flamegraph.pl
+    и speedscope.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def enable(self):
+        self._sampler.start()
+
+    def disable(self):
+        self._stop.set()
+        self._sampler.join()
+
+    def dump_stats(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self.stacks.items():
+                file.write(f'{stack} {count}\n')
+
+
+PROFILERS = {
+    'cprofile': ('.pstats', cProfile.Profile),
+    'sampling': (
+        '.collapsed',
+        lambda: StackSampler(settings.PROFILER_INTERVAL),
+    ),
+}
+
+
+def profile_path(view_name, extension):
+    """Файл для профиля: PROFILER_DIR/<страница>/<время>-<pid><расширение>."""
+    directory = os.path.join(
+        settings.PROFILER_DIR, view_name.replace(':', '.')
+    )
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(
+        directory,
+        f'{time.time_ns()}-{os.getpid()}-{threading.get_ident()}{extension}'
+    )
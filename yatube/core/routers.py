@@ -0,0 +1,44 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def set_read_replica(enabled):
+    """Включает чтение с реплики для текущего потока."""
+    _state.replica = enabled
+
+
+@contextmanager
+def read_from_replica():
+    """Направляет чтения внутри блока на реплику, если она настроена."""
+    previous = getattr(_state, 'replica', False)
+    set_read_replica(True)
+    try:
+        yield
+    finally:
+        set_read_replica(previous)
+
+
+class PrimaryReplicaRouter:
+    """Пишет всегда в основную базу, читает с реплики внутри
+    read_from_replica() — только модели из REPLICA_APP_LABELS.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (getattr(_state, 'replica', False)
+                and settings.REPLICA_DATABASE in settings.DATABASES
+                and model._meta.app_label in settings.REPLICA_APP_LABELS):
+            return settings.REPLICA_DATABASE
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == 'default'
@@ -0,0 +1,78 @@
+import json
+import logging
+import re
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger('yatube.slow_queries')
+
+FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%s|\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?+)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def fingerprint(sql):
+    """Приводит запрос к виду без значений, чтобы группировать похожие."""
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def explain(connection, sql, params):
+    prefix = (
+        'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        return [' '.join(map(str, row[3:] or row)) for row in cursor]
+
+
+class SlowQueryLogger:
+    """Обёртка execute_wrapper: записывает запросы дольше порога.
+
+    Для каждого медленного запроса сохраняются отпечаток, страница,
+    которая его выполнила, и план, снятый сразу же на том же
+    соединении. Записи дописываются строками JSON в SLOW_QUERY_LOG.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self._explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self._explaining:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= settings.SLOW_QUERY_THRESHOLD and not many:
+                self.record(context['connection'], sql, params, duration)
+
+    def record(self, connection, sql, params, duration):
+        self._explaining = True
+        try:
+            plan = explain(connection, sql, params)
+        except Exception as error:
+            plan = [f'EXPLAIN не удался: {error}']
+        finally:
+            self._explaining = False
+        match = self.request.resolver_match
+        entry = {
+            'fingerprint': fingerprint(sql),
+            'view': match.view_name if match is not None else None,
+            'duration': duration,
+            'sql': sql,
+            'plan': plan,
+        }
+        logger.warning(
+            'Медленный запрос %.1f мс в %s: %s',
+            duration * 1000, entry['view'], entry['fingerprint'],
+        )
+        with open(settings.SLOW_QUERY_LOG, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(entry, ensure_ascii=False) + '\n')
@@ -0,0 +1,115 @@
+import json
+import os
+import time
+import uuid
+
+from django.conf import settings
+
+
+class Spool:
+    """Надёжная локальная очередь: одно сообщение — один JSON-файл.
+
+    Сообщение сначала пишется во tmp/, сбрасывается на диск и только
+    потом атомарно переносится в new/<key>/, поэтому читатель никогда
+    не увидит недописанный файл. Обработчик забирает сообщения
+    переносом в processing/ и удаляет их после успешной записи в базу.
+    Доставка «хотя бы один раз»: обработчик должен уметь пропустить
+    уже записанное сообщение.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def root(self):
+        return os.path.join(settings.SPOOL_ROOT, self.name)
+
+    def _dir(self, state, key=''):
+        path = os.path.join(self.root, state, str(key))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def put(self, payload, key=''):
+        filename = f'{time.time_ns()}-{uuid.uuid4().hex}.json'
+        tmp_path = os.path.join(self._dir('tmp'), filename)
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(payload, file, ensure_ascii=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, os.path.join(self._dir('new', key), filename))
+
+    def pending(self, key):
+        """Сообщения с ключом key, ещё не записанные в базу."""
+        payloads = []
+        for state in ('processing', 'new'):
+            path = os.path.join(self.root, state, str(key))
+            try:
+                filenames = sorted(os.listdir(path))
+            except FileNotFoundError:
+                continue
+            for filename in filenames:
+                try:
+                    with open(os.path.join(path, filename),
+                              encoding='utf-8') as file:
+                        payloads.append(json.load(file))
+                except FileNotFoundError:
+                    # Обработчик успел забрать сообщение.
+                    continue
+        return payloads
+
+    def claim(self, limit):
+        """Забирает до limit старейших сообщений в обработку.
+
+        Возвращает список пар (путь в processing/, сообщение).
+        """
+        new_root = os.path.join(self.root, 'new')
+        try:
+            keys = os.listdir(new_root)
+        except FileNotFoundError:
+            return []
+        candidates = sorted(
+            (filename, key)
+            for key in keys
+            for filename in os.listdir(os.path.join(new_root, key))
+        )[:limit]
+        claimed = []
+        for filename, key in candidates:
+            new_path = os.path.join(new_root, key, filename)
+            path = os.path.join(self._dir('processing', key), filename)
+            try:
+                # Время изменения — начало аренды, см. recover.
+                os.utime(new_path)
+                os.replace(new_path, path)
+            except FileNotFoundError:
+                continue
+            with open(path, encoding='utf-8') as file:
+                claimed.append((path, json.load(file)))
+        return claimed
+
+    def ack(self, paths):
+        for path in paths:
+            os.remove(path)
+
+    def recover(self, lease):
+        """Возвращает в new/ сообщения, брошенные упавшим обработчиком.
+
+        Брошенным считается сообщение, взятое в обработку больше lease
+        секунд назад: свежие принадлежат работающему обработчику.
+        """
+        processing_root = os.path.join(self.root, 'processing')
+        try:
+            keys = os.listdir(processing_root)
+        except FileNotFoundError:
+            return
+        expired = time.time() - lease
+        for key in keys:
+            for filename in os.listdir(os.path.join(processing_root, key)):
+                path = os.path.join(processing_root, key, filename)
+                try:
+                    if os.stat(path).st_mtime >= expired:
+                        continue
+                    os.replace(
+                        path, os.path.join(self._dir('new', key), filename)
+                    )
+                except FileNotFoundError:
+                    continue
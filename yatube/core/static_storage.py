@@ -0,0 +1,60 @@
+import gzip
+import posixpath
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Картинки и шрифты уже сжаты, повторно жать их незачем.
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.json', '.svg', '.ico', '.txt', '.xml',
+)
+
+
+def compressors():
+    """Пары (расширение, функция сжатия); brotli — если он установлен."""
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и заранее сжатыми копиями.
+
+    collectstatic кладёт рядом с каждым хешированным текстовым файлом
+    его .gz (и .br), и веб-сервер отдаёт их без сжатия на лету. Имя
+    меняется вместе с содержимым, поэтому такие файлы кешируются
+    навсегда (manage.py nginx_config).
+    """
+
+    def stored_name(self, name):
+        # До первого collectstatic манифеста нет: при разработке
+        # и в тестах отдаём исходные имена.
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if posixpath.splitext(name)[1] in COMPRESSIBLE_EXTENSIONS:
+                yield from self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        for extension, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue
+            compressed_name = name + extension
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
+            yield name, compressed_name, True
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import posixpath
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from .models import MediaBlob
+
+CHUNK_SIZE = 64 * 1024
+
+
+def file_digest(content):
+    """Считает SHA-256 файла по частям, не читая его в память целиком."""
+    sha = hashlib.sha256()
+    for chunk in content.chunks(CHUNK_SIZE):
+        sha.update(chunk)
+    content.seek(0)
+    return sha.hexdigest()
+
+
+def iter_files(storage, path):
+    """Потоково обходит каталог хранилища, отдавая пары (имя, stat)."""
+    try:
+        entries = os.scandir(storage.path(path))
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            name = posixpath.join(path, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(storage, name)
+            elif entry.is_file(follow_symlinks=False):
+                yield name, entry.stat()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файловое хранилище с дедупликацией по хешу содержимого.
+
+    Для каждого файла в MediaBlob хранится его SHA-256 и счётчик ссылок.
+    Повторная загрузка того же содержимого не пишет ничего на диск,
+    а возвращает имя уже сохранённого файла. Миниатюры sorl строятся
+    по имени исходника, поэтому и они у дубликатов общие.
+    """
+
+    def _save(self, name, content):
+        digest = file_digest(content)
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(
+                digest=digest
+            ).first()
+            if blob is not None:
+                if not self.exists(blob.name):
+                    # Файл пропал с диска, а посты на него ещё ссылаются:
+                    # возвращаем его на место, сохраняя их ссылки.
+                    blob.name = super()._save(blob.name, content)
+                self._acquire(blob)
+                return blob.name
+            name = super()._save(name, content)
+            try:
+                with transaction.atomic():
+                    MediaBlob.objects.create(
+                        digest=digest,
+                        name=name,
+                        size=content.size,
+                        refcount=1,
+                    )
+            except IntegrityError:
+                # Тот же файл параллельно сохранил другой процесс.
+                super().delete(name)
+                blob = MediaBlob.objects.get(digest=digest)
+                self._acquire(blob)
+                return blob.name
+        return name
+
+    def _acquire(self, blob):
+        MediaBlob.objects.filter(pk=blob.pk).update(
+            name=blob.name,
+            refcount=F('refcount') + 1,
+            acquired=timezone.now(),
+        )
+
+    def release(self, name):
+        """Снимает одну ссылку на файл.
+
+        Когда ссылок не остаётся, файл, его миниатюры и записи sorl
+        удаляются после фиксации транзакции. Файлы, которых нет
+        в MediaBlob, не трогает.
+        """
+        with transaction.atomic():
+            updated = MediaBlob.objects.filter(
+                name=name, refcount__gt=0
+            ).update(refcount=F('refcount') - 1)
+            if not updated:
+                return False
+            deleted, _ = MediaBlob.objects.filter(
+                name=name, refcount=0
+            ).delete()
+        if deleted:
+            transaction.on_commit(lambda: self.purge(name))
+        return bool(deleted)
+
+    def purge(self, name):
+        """Удаляет файл вместе с миниатюрами и ключами sorl."""
+        delete_thumbnails(ImageFile(name, self), delete_file=False)
+        self.delete(name)
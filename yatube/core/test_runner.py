@@ -0,0 +1,32 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Прогон тестов со своими временными каталогами кеша и очередей.
+
+    Тесты не читают и не портят кеш и очереди работающего сервера.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.temp_dir = tempfile.mkdtemp()
+        shared = {
+            **settings.CACHES['shared'],
+            'LOCATION': os.path.join(self.temp_dir, 'cache'),
+        }
+        self.temp_settings = override_settings(
+            CACHES={**settings.CACHES, 'shared': shared},
+            SPOOL_ROOT=os.path.join(self.temp_dir, 'spool'),
+        )
+        self.temp_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.temp_settings.disable()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,70 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+
+from .metrics import increment
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+REJECTED_KEY = 'throttle:rejected:{}'
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): ёмкость ведра и период её восполнения."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def take_tokens(keys, rate):
+    """Учитывает запрос во всех счётчиках keys текущего окна.
+
+    Окно фиксированное: счётчик живёт один период и сбрасывается
+    на его границе. Запрос проходит, только если место есть во всех
+    счётчиках, и лишь тогда каждый увеличивается атомарным incr.
+    Возвращает 0, если запрос разрешён, иначе — сколько секунд ждать
+    следующего окна.
+    """
+    capacity, period = parse_rate(rate)
+    now = time.time()
+    window = int(now // period)
+    wait = period - now % period
+    keys = [f'{key}:{window}' for key in keys]
+    counts = cache.get_many(keys)
+    if any(counts.get(key, 0) >= capacity for key in keys):
+        return wait
+    for index, key in enumerate(keys):
+        if increment_window(key, period) > capacity:
+            # Параллельные запросы заняли последнее место раньше.
+            for taken in keys[:index + 1]:
+                cache.decr(taken)
+            return wait
+    return 0
+
+
+def increment_window(key, period):
+    if cache.add(key, 1, period):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Окно истекло между add и incr.
+        cache.add(key, 1, period)
+        return 1
+
+
+def stats_cache():
+    return caches[settings.THROTTLE_STATS_CACHE_ALIAS]
+
+
+def count_rejection(view_name):
+    key = REJECTED_KEY.format(view_name)
+    if not stats_cache().add(key, 1, None):
+        stats_cache().incr(key)
+    increment('yatube_throttle_rejections_total', view=view_name)
+
+
+def rejection_counts(view_names):
+    """Сколько запросов к каждой странице отклонено всеми процессами."""
+    keys = {REJECTED_KEY.format(name): name for name in view_names}
+    counts = stats_cache().get_many(keys)
+    return {name: counts.get(key, 0) for key, name in keys.items()}
@@ -0,0 +1,15 @@
+from sorl.thumbnail.base import ThumbnailBackend
+
+from .metrics import timer
+
+
+class MetricsThumbnailBackend(ThumbnailBackend):
+    """Меряет время создания миниатюр: ресайз, кодирование и запись."""
+
+    def _create_thumbnail(self, source_image, geometry_string, options,
+                          thumbnail):
+        with timer('yatube_thumbnail_create_seconds',
+                   geometry=geometry_string):
+            super()._create_thumbnail(
+                source_image, geometry_string, options, thumbnail
+            )
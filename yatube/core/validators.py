@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
+
+
+def validate_image_upload(upload):
+    """Проверяет картинку по заголовку, не декодируя её целиком.
+
+    Отсекает слишком большие файлы, неразрешённые форматы и картинки
+    с огромным числом пикселей, которые при генерации миниатюр
+    заняли бы всю память воркера.
+    """
+    if upload.size > settings.IMAGE_UPLOAD_MAX_SIZE:
+        raise ValidationError(
+            'Файл больше %(limit)s.',
+            code='file_too_large',
+            params={'limit': filesizeformat(settings.IMAGE_UPLOAD_MAX_SIZE)},
+        )
+    # forms.ImageField уже открыл заголовок и сохранил его в upload.image.
+    image = getattr(upload, 'image', None)
+    if image is None:
+        upload.seek(0)
+        image = Image.open(upload)
+        upload.seek(0)
+    if image.format not in settings.IMAGE_UPLOAD_FORMATS:
+        raise ValidationError(
+            'Формат %(format)s не поддерживается.',
+            code='invalid_format',
+            params={'format': image.format},
+        )
+    width, height = image.size
+    if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка %(width)s×%(height)s слишком большая.',
+            code='too_many_pixels',
+            params={'width': width, 'height': height},
+        )
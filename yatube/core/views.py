@@ -1,4 +1,21 @@
+import mimetypes
+import os
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+from .metrics import collect
+from .metrics import render as render_metrics
 
 
 def page_not_found(request, exception):
@@ -15,3 +32,57 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+def metrics(request):
+    """Метрики всех воркеров для локального сборщика Prometheus."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    return HttpResponse(
+        render_metrics(*collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+def media(request, path):
+    """Файл из MEDIA_ROOT: Django проверяет путь, байты отдаёт веб-сервер.
+
+    С MEDIA_SERVE_HEADER ответ содержит только заголовок X-Accel-Redirect
+    (nginx) или X-Sendfile (Apache), и файл передаёт сервер, не занимая
+    воркер. Без него файл читает сам воркер, как при разработке.
+    """
+    if any(part.startswith('.') for part in path.split('/')):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        file_stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        file_stat.st_mtime,
+        file_stat.st_size,
+    ):
+        response = HttpResponseNotModified()
+    elif settings.MEDIA_SERVE_HEADER:
+        content_type, _ = mimetypes.guess_type(full_path)
+        response = HttpResponse(
+            content_type=content_type or 'application/octet-stream'
+        )
+        if settings.MEDIA_SERVE_HEADER == 'X-Accel-Redirect':
+            response['X-Accel-Redirect'] = (
+                settings.MEDIA_ACCEL_PREFIX + quote(path)
+            )
+        else:
+            response[settings.MEDIA_SERVE_HEADER] = full_path
+    else:
+        response = FileResponse(open(full_path, 'rb'))
+    response['Last-Modified'] = http_date(file_stat.st_mtime)
+    if path.startswith(thumbnail_settings.THUMBNAIL_PREFIX):
+        max_age = settings.MEDIA_THUMBNAIL_CACHE_SECONDS
+    else:
+        max_age = settings.MEDIA_CACHE_SECONDS
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
@@ -0,0 +1,143 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.functional import cached_property
+
+from .feeds import touch_feeds
+from .models import (ArchivedComment, ArchivedPost, Comment, Notification,
+                     Post, PostTag)
+from .post_cache import invalidate_posts
+
+VERSION_KEY = 'archive:version'
+COUNT_KEY = 'archive:count:{}:{}'
+
+
+def archive_cache():
+    return caches[settings.ARCHIVE_CACHE_ALIAS]
+
+
+def archived_count(scope, queryset):
+    """Размер архивной части ленты scope.
+
+    Архив меняется только при запуске archive_posts, поэтому
+    результат COUNT хранится в кеше до следующего переноса.
+    Без scope число считается каждый раз.
+    """
+    if scope is None:
+        return queryset.count()
+    cache = archive_cache()
+    version = cache.get(VERSION_KEY, 0)
+    key = COUNT_KEY.format(version, scope)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.ARCHIVE_COUNT_SECONDS)
+    return count
+
+
+def author_post_count(author):
+    """Число постов автора в обеих частях: горячей и архивной."""
+    return author.posts.count() + archived_count(
+        f'author:{author.pk}', author.archived_posts.all()
+    )
+
+
+class PartitionedPosts:
+    """Лента для Paginator: сначала горячие посты, затем архивные.
+
+    Пока страница целиком в горячей части, архив не читается,
+    а его размер для числа страниц берётся из кеша.
+    """
+
+    def __init__(self, hot, archived, scope=None):
+        self.hot = hot
+        self.archived = archived
+        self.scope = scope
+
+    @cached_property
+    def hot_count(self):
+        return self.hot.count()
+
+    def count(self):
+        return self.hot_count + archived_count(self.scope, self.archived)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = self.count() if key.stop is None else key.stop
+        items = []
+        if start < self.hot_count:
+            items += self.hot[start:min(stop, self.hot_count)]
+        if stop > self.hot_count:
+            items += self.archived[
+                max(start - self.hot_count, 0):stop - self.hot_count
+            ]
+        return items
+
+
+def archive_posts(before, batch_size):
+    """Переносит посты старше before вместе с комментариями в архив.
+
+    Каждая пачка переносится своей транзакцией. Строки удаляются из
+    горячих таблиц без сигналов: сигналы Post сняли бы ссылки на
+    картинки, которые теперь принадлежат архиву. Поэтому кеш страниц
+    постов сбрасывается здесь же. Уведомления и теги старых постов
+    удаляются: ленты тегов показывают только горячие посты.
+    Возвращает число перенесённых постов и комментариев.
+    """
+    moved_posts = moved_comments = 0
+    scopes = {'index'}
+    while True:
+        with transaction.atomic():
+            batch = list(Post.objects.filter(
+                created__lt=before
+            ).select_related('author', 'group').order_by('pk')[:batch_size])
+            if not batch:
+                break
+            ids = [post.pk for post in batch]
+            ArchivedPost.objects.bulk_create(
+                ArchivedPost(
+                    id=post.pk,
+                    text=post.text,
+                    text_html=post.text_html,
+                    text_version=post.text_version,
+                    excerpt=post.excerpt,
+                    excerpt_truncated=post.excerpt_truncated,
+                    author_id=post.author_id,
+                    group_id=post.group_id,
+                    image=post.image.name,
+                    comment_count=post.comment_count,
+                    created=post.created,
+                )
+                for post in batch
+            )
+            comments = list(Comment.objects.filter(post_id__in=ids))
+            ArchivedComment.objects.bulk_create(
+                ArchivedComment(
+                    id=comment.pk,
+                    post_id=comment.post_id,
+                    author_id=comment.author_id,
+                    text=comment.text,
+                    text_html=comment.text_html,
+                    text_version=comment.text_version,
+                    created=comment.created,
+                )
+                for comment in comments
+            )
+            moved_comments += len(comments)
+            for model in (Notification, PostTag, Comment):
+                queryset = model.objects.filter(post_id__in=ids)
+                queryset._raw_delete(queryset.db)
+            queryset = Post.objects.filter(pk__in=ids)
+            queryset._raw_delete(queryset.db)
+            invalidate_posts(ids)
+        moved_posts += len(batch)
+        scopes.update(f'author:{post.author.username}' for post in batch)
+        scopes.update(f'group:{post.group.slug}' for post in batch
+                      if post.group is not None)
+    if moved_posts:
+        cache = archive_cache()
+        cache.set(VERSION_KEY, cache.get(VERSION_KEY, 0) + 1, None)
+        touch_feeds(scopes)
+    return moved_posts, moved_comments
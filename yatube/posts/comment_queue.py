@@ -0,0 +1,120 @@
+import uuid
+from collections import Counter
+
+from core.spool import Spool
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+
+from .mentions import extract_mentions, mentioned_users
+from .models import Comment, Post
+from .notifications import notify_mentions
+from .rendering import render_objects
+
+User = get_user_model()
+
+spool = Spool('comments')
+
+
+def enqueue_comment(post_id, author, text):
+    """Кладёт проверенный комментарий в очередь вместо записи в базу."""
+    spool.put(
+        {
+            'id': uuid.uuid4().hex,
+            'post_id': post_id,
+            'author_id': author.id,
+            'text': text,
+        },
+        key=post_id,
+    )
+
+
+def queued_comment(payload, **kwargs):
+    return Comment(
+        spool_id=uuid.UUID(payload['id']) if 'id' in payload else None,
+        text=payload['text'],
+        **kwargs,
+    )
+
+
+def pending_comments(post, author, saved=()):
+    """Ещё не записанные комментарии автора к посту.
+
+    Нужны, чтобы пользователь сразу видел свой комментарий.
+    Сообщения, которые уже есть среди saved, пропускаются.
+    """
+    seen = {comment.spool_id for comment in saved}
+    pending = (
+        queued_comment(payload, post=post, author=author)
+        for payload in spool.pending(post.id)
+        if payload['author_id'] == author.id
+    )
+    return [
+        comment for comment in pending
+        if comment.spool_id is None or comment.spool_id not in seen
+    ]
+
+
+def flush_comments(batch_size):
+    """Записывает пачку комментариев из очереди одной транзакцией.
+
+    Комментарии к удалённым постам и от удалённых пользователей
+    отбрасываются. Возвращает пару: сколько сообщений взято из очереди
+    и сколько комментариев записано. Пока первое не ноль, очередь
+    стоит разбирать дальше, даже если вся пачка отброшена.
+    """
+    claimed = spool.claim(batch_size)
+    if not claimed:
+        return 0, 0
+    comments = [
+        queued_comment(
+            payload,
+            post_id=payload['post_id'],
+            author_id=payload['author_id'],
+        )
+        for _, payload in claimed
+    ]
+    posts = set(Post.objects.filter(
+        pk__in={comment.post_id for comment in comments}
+    ).values_list('pk', flat=True))
+    authors = set(User.objects.filter(
+        pk__in={comment.author_id for comment in comments}
+    ).values_list('pk', flat=True))
+    comments = [
+        comment for comment in comments
+        if comment.post_id in posts and comment.author_id in authors
+    ]
+    # bulk_create не шлёт pre_save: HTML рисуется здесь, пачкой.
+    render_objects(comments, posts=False)
+    with transaction.atomic():
+        # Сообщения, записанные до сбоя перед ack, повторно не пишутся.
+        written = set(Comment.objects.filter(spool_id__in=[
+            comment.spool_id for comment in comments if comment.spool_id
+        ]).values_list('spool_id', flat=True))
+        comments = [
+            comment for comment in comments
+            if comment.spool_id not in written
+        ]
+        # bulk_create не шлёт сигналы, поэтому счётчики — одним UPDATE
+        # на каждое встречающееся число новых комментариев.
+        per_post = Counter(comment.post_id for comment in comments)
+        by_count = {}
+        for post_id, count in per_post.items():
+            by_count.setdefault(count, []).append(post_id)
+        Comment.objects.bulk_create(comments)
+        for count, post_ids in by_count.items():
+            Post.objects.filter(pk__in=post_ids).update(
+                comment_count=F('comment_count') + count
+            )
+    spool.ack(path for path, _ in claimed)
+    # Упоминания всех комментариев пачки — одним разрешением имён.
+    users = mentioned_users(comment.text for comment in comments)
+    mentioned = {}
+    for comment in comments:
+        mentioned.setdefault(comment.post_id, set()).update(
+            users[name] for name in extract_mentions(comment.text)
+            if name in users and users[name] != comment.author_id
+        )
+    for post_id, user_ids in mentioned.items():
+        notify_mentions(post_id, list(user_ids))
+    return len(claimed), len(comments)
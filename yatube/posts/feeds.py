@@ -0,0 +1,171 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+from django.utils.text import Truncator
+
+from .models import Group, Post
+
+User = get_user_model()
+
+STAMP_KEY = 'feed:stamp:{}'
+XML_KEY = 'feed:xml:{}:{}:{}:{}'
+
+
+def feed_cache():
+    return caches[settings.FEED_CACHE_ALIAS]
+
+
+def feed_stamp(scope):
+    """Время последнего изменения ленты scope.
+
+    Если отметки в кеше нет, лента считается изменённой сейчас.
+    """
+    key = STAMP_KEY.format(scope)
+    stamp = feed_cache().get(key)
+    if stamp is None:
+        stamp = time.time()
+        if not feed_cache().add(key, stamp, None):
+            stamp = feed_cache().get(key, stamp)
+    return stamp
+
+
+def touch_feeds(scopes):
+    """Отмечает ленты изменёнными: их XML и ETag станут другими."""
+    now = time.time()
+    feed_cache().set_many(
+        {STAMP_KEY.format(scope): now for scope in scopes}, None
+    )
+
+
+class CachedFeed(Feed):
+    """Лента, XML которой строится один раз на каждое изменение.
+
+    Отметка времени изменения ленты (scope) даёт ETag
+    и Last-Modified, поэтому повторный опрос отвечается 304 без
+    запросов к базе. Готовый XML лежит в кеше под ключом с этой
+    отметкой, и после изменения старый ключ просто перестаёт читаться.
+    """
+
+    def __call__(self, request, *args, **kwargs):
+        scope = self.scope(**kwargs)
+        stamp = feed_stamp(scope)
+        kind = self.feed_type.__name__
+        etag = f'"{scope}:{kind}:{stamp!r}"'
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(stamp)
+        )
+        if response is not None:
+            return response
+        key = XML_KEY.format(
+            scope, kind, request.build_absolute_uri('/'), stamp
+        )
+        cached = feed_cache().get(key)
+        if cached is None:
+            response = super().__call__(request, *args, **kwargs)
+            cached = (response.content, response['Content-Type'])
+            feed_cache().set(key, cached, settings.FEED_CACHE_SECONDS)
+        response = HttpResponse(cached[0], content_type=cached[1])
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(stamp)
+        return response
+
+    def item_title(self, item):
+        return Truncator(item.text).chars(60)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_pubdate(self, item):
+        return item.created
+
+
+class PostsFeed(CachedFeed):
+    title = 'Yatube: последние записи'
+    description = 'Новые посты всех авторов.'
+    subtitle = description
+
+    def scope(self):
+        return 'index'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        return Post.objects.select_related(
+            'author'
+        )[:settings.FEED_ITEMS]
+
+
+class GroupFeed(CachedFeed):
+    def scope(self, slug):
+        return f'group:{slug}'
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    subtitle = description
+
+    def link(self, group):
+        return reverse('posts:group_list', kwargs={'slug': group.slug})
+
+    def items(self, group):
+        return group.posts.select_related(
+            'author'
+        )[:settings.FEED_ITEMS]
+
+
+class AuthorFeed(CachedFeed):
+    def scope(self, username):
+        return f'author:{username}'
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Посты пользователя {author.username}.'
+
+    subtitle = description
+
+    def link(self, author):
+        return reverse('posts:profile', kwargs={'username': author.username})
+
+    def items(self, author):
+        return author.posts.select_related(
+            'author'
+        )[:settings.FEED_ITEMS]
+
+
+class PostsAtomFeed(PostsFeed):
+    feed_type = Atom1Feed
+
+
+class GroupAtomFeed(GroupFeed):
+    feed_type = Atom1Feed
+
+
+class AuthorAtomFeed(AuthorFeed):
+    feed_type = Atom1Feed
@@ -0,0 +1,54 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import Follow
+from .utils import chunked
+
+User = get_user_model()
+
+# Столько значений уходит в один IN (...) или INSERT.
+BATCH_SIZE = 500
+
+
+def user_ids(usernames):
+    """Словарь имя пользователя -> id для существующих пользователей."""
+    ids = {}
+    for batch in chunked(set(usernames), BATCH_SIZE):
+        ids.update(User.objects.filter(
+            username__in=batch
+        ).values_list('username', 'id'))
+    return ids
+
+
+def apply_follows(operations):
+    """Применяет подписки и отписки одной транзакцией.
+
+    operations — пары ((user_id, author_id), подписаться ли). Для пары
+    действует последняя операция, подписки на себя пропускаются.
+    Подписки пишутся bulk_create с ignore_conflicts, поэтому уже
+    существующие не мешают; отписки удаляются одним DELETE на
+    читателя. Возвращает число подписок и число удалённых строк.
+    """
+    final = dict(operations)
+    follows = [
+        Follow(user_id=user_id, author_id=author_id)
+        for (user_id, author_id), follow in final.items()
+        if follow and user_id != author_id
+    ]
+    unfollows = defaultdict(list)
+    for (user_id, author_id), follow in final.items():
+        if not follow:
+            unfollows[user_id].append(author_id)
+    deleted = 0
+    with transaction.atomic():
+        for user_id, author_ids in unfollows.items():
+            for batch in chunked(author_ids, BATCH_SIZE):
+                deleted += Follow.objects.filter(
+                    user_id=user_id, author_id__in=batch
+                ).delete()[0]
+        Follow.objects.bulk_create(
+            follows, batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
+    return len(follows), deleted
@@ -1,3 +1,4 @@
+from core.validators import validate_image_upload
 from django import forms
 
 from .models import Comment, Post
@@ -8,6 +9,10 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['image'].validators.append(validate_image_upload)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
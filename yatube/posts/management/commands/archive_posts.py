@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from posts.archive import archive_posts
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Переносит посты старше --days дней с комментариями в архив.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.ARCHIVE_AFTER_DAYS,
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать, сколько постов попадёт в архив.',
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        if options['dry_run']:
+            count = Post.objects.filter(created__lt=before).count()
+            self.stdout.write(f'Будет перенесено постов: {count}')
+            return
+        posts, comments = archive_posts(before, options['batch_size'])
+        self.stdout.write(
+            f'Перенесено постов: {posts}, комментариев: {comments}'
+        )
@@ -0,0 +1,82 @@
+from collections import defaultdict
+
+from core.models import MediaBlob
+from core.storage import file_digest, iter_files
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from posts.models import ArchivedPost, Post
+from posts.post_cache import invalidate_posts
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+
+class Command(BaseCommand):
+    help = (
+        'Склеивает побайтно одинаковые картинки постов в один файл '
+        'и заводит их в учёт MediaBlob.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, сколько места освободится.',
+        )
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field('image')
+        storage = field.storage
+        groups = defaultdict(list)
+        for name, _ in iter_files(storage, field.upload_to.rstrip('/')):
+            with storage.open(name) as content:
+                groups[file_digest(content)].append(name)
+
+        merged = freed = 0
+        for digest, names in groups.items():
+            blob = MediaBlob.objects.filter(digest=digest).first()
+            if blob is not None and blob.name in names:
+                canonical = blob.name
+            else:
+                canonical = min(names, key=lambda name: (len(name), name))
+            duplicates = [name for name in names if name != canonical]
+            merged += len(duplicates)
+            freed += sum(storage.size(name) for name in duplicates)
+            if options['dry_run']:
+                continue
+            self.merge(storage, digest, canonical, duplicates)
+
+        verb = 'Будет склеено' if options['dry_run'] else 'Склеено'
+        self.stdout.write(
+            f'{verb} файлов: {merged}, освобождается байт: {freed}'
+        )
+
+    def merge(self, storage, digest, canonical, duplicates):
+        with transaction.atomic():
+            refcount = 0
+            invalidate_posts(Post.objects.filter(
+                image__in=duplicates
+            ).values_list('pk', flat=True))
+            for model in (Post, ArchivedPost):
+                model.objects.filter(
+                    image__in=duplicates
+                ).update(image=canonical)
+                refcount += model.objects.filter(image=canonical).count()
+            if refcount:
+                MediaBlob.objects.update_or_create(
+                    digest=digest,
+                    defaults={
+                        'name': canonical,
+                        'size': storage.size(canonical),
+                        'refcount': refcount,
+                        'acquired': timezone.now(),
+                    }
+                )
+        for name in duplicates:
+            # Миниатюры, сделанные до перехода на новое хранилище,
+            # записаны в sorl под ключом стандартного хранилища.
+            delete_thumbnails(
+                ImageFile(name, FileSystemStorage()), delete_file=False
+            )
+            storage.purge(name)
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from posts.notifications import process_fanouts, spool
+
+
+class Command(BaseCommand):
+    help = 'Рассылает подписчикам уведомления о новых постах из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.NOTIFICATIONS_BATCH_SIZE,
+            help='Сколько уведомлений вставлять одним INSERT.',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а проверять очередь каждые --interval с.',
+        )
+        parser.add_argument('--interval', type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            spool.recover(settings.SPOOL_LEASE_SECONDS)
+            processed = process_fanouts(10, options['batch_size'])
+            total += processed
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(f'Разослано постов: {total}')
@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from posts.comment_queue import flush_comments, spool
+
+
+class Command(BaseCommand):
+    help = 'Записывает в базу комментарии из очереди отложенной записи.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.COMMENTS_FLUSH_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а проверять очередь каждые --interval с.',
+        )
+        parser.add_argument('--interval', type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            spool.recover(settings.SPOOL_LEASE_SECONDS)
+            claimed, written = flush_comments(options['batch_size'])
+            total += written
+            if claimed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(f'Записано комментариев: {total}')
@@ -0,0 +1,214 @@
+import os
+import posixpath
+import re
+import time
+from datetime import timedelta
+
+from core.models import MediaBlob
+from core.storage import iter_files
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
+from posts.models import ArchivedPost, Post
+from posts.utils import chunked
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import deserialize
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix, del_prefix
+from sorl.thumbnail.models import KVStore
+
+# Дополнительные разрешения sorl: cache/ab/cd/<key>@2x.jpg
+RESOLUTION_SUFFIX = re.compile(r'@[\d.]+x(?=\.\w+$)')
+
+
+def referenced_images(names):
+    """Имена из names, на которые ссылаются посты, в том числе архивные."""
+    return {
+        name
+        for model in (Post, ArchivedPost)
+        for name in model.objects.filter(
+            image__in=names
+        ).values_list('image', flat=True)
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов, миниатюры и записи sorl, '
+        'на которые больше не ссылается ни один пост.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать, сколько места освободится.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько файлов сверять с базой за один запрос.',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help='Не трогать файлы, загруженные или заново '
+                 'использованные за столько секунд.',
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.batch_size = options['batch_size']
+        self.cutoff = time.time() - options['min_age']
+        self.acquired_cutoff = (
+            timezone.now() - timedelta(seconds=options['min_age'])
+        )
+
+        field = Post._meta.get_field('image')
+        self.storage = field.storage
+        storage_class = type(self.storage)
+        self.storage_path = (
+            f'{storage_class.__module__}.{storage_class.__name__}'
+        )
+        self.thumbnail_storage = default.storage
+
+        originals = self.collect_originals(field.upload_to.rstrip('/'))
+        live, stale_keys = self.collect_thumbnail_keys()
+        thumbnails = self.collect_thumbnails(live)
+        if not self.dry_run:
+            for batch in chunked(stale_keys, self.batch_size):
+                default.kvstore._delete_raw(*batch)
+
+        verb = 'Будет удалено' if self.dry_run else 'Удалено'
+        self.stdout.write(
+            f'{verb} оригиналов: {originals[0]} '
+            f'({filesizeformat(originals[1])})'
+        )
+        self.stdout.write(
+            f'{verb} миниатюр: {thumbnails[0]} '
+            f'({filesizeformat(thumbnails[1])})'
+        )
+        self.stdout.write(f'{verb} записей sorl: {len(stale_keys)}')
+        self.stdout.write(
+            'Всего освобождается: '
+            f'{filesizeformat(originals[1] + thumbnails[1])}'
+        )
+
+    def old_files(self, storage, path):
+        for name, stat in iter_files(storage, path):
+            if stat.st_mtime < self.cutoff:
+                yield name, stat.st_size
+
+    def collect_originals(self, path):
+        """Сверяет файлы из media/posts с постами пачками.
+
+        Возраст файла с записью MediaBlob считается от последней новой
+        ссылки на него, а не от загрузки: дедупликация может отдать
+        старый файл новому посту. Пачка проверяется и удаляется в одной
+        транзакции под блокировкой записей MediaBlob, поэтому хранилище
+        не выдаст файл, который уже решено удалить.
+        """
+        count = size = 0
+        for batch in chunked(iter_files(self.storage, path),
+                             self.batch_size):
+            names = [name for name, _ in batch]
+            with transaction.atomic():
+                acquired = dict(MediaBlob.objects.select_for_update().filter(
+                    name__in=names
+                ).values_list('name', 'acquired'))
+                referenced = referenced_images(names)
+                orphans = [
+                    (name, stat.st_size) for name, stat in batch
+                    if name not in referenced
+                    and self.is_old(acquired.get(name), stat)
+                ]
+                count += len(orphans)
+                size += sum(bytes_ for _, bytes_ in orphans)
+                if self.dry_run or not orphans:
+                    continue
+                names = [name for name, _ in orphans]
+                MediaBlob.objects.filter(name__in=names).delete()
+            # Записей уже нет, новый пост получит файл под другим именем.
+            for name in names:
+                self.storage.delete(name)
+        return count, size
+
+    def is_old(self, acquired, stat):
+        if acquired is not None:
+            return acquired < self.acquired_cutoff
+        return stat.st_mtime < self.cutoff
+
+    def collect_thumbnail_keys(self):
+        """Разбирает записи sorl на живые миниатюры и мусор.
+
+        Миниатюра жива, если её исходник лежит в текущем хранилище
+        и на него ссылается пост. Ключи остальных исходников и их
+        миниатюр возвращаются для удаления.
+        """
+        live, stale = set(), []
+        rows = KVStore.objects.filter(
+            key__startswith=add_prefix('', 'thumbnails')
+        ).values_list('key', 'value').iterator()
+        for batch in chunked(rows, self.batch_size):
+            thumbnails = {
+                del_prefix(key): deserialize(value) for key, value in batch
+            }
+            sources = {
+                del_prefix(key): deserialize(value)
+                for key, value in KVStore.objects.filter(
+                    key__in=[add_prefix(key) for key in thumbnails]
+                ).values_list('key', 'value')
+            }
+            referenced = referenced_images(
+                [source['name'] for source in sources.values()]
+            )
+            for key, thumbnail_keys in thumbnails.items():
+                source = sources.get(key)
+                if (source is not None
+                        and source['storage'] == self.storage_path
+                        and source['name'] in referenced):
+                    live.update(thumbnail_keys)
+                    continue
+                stale.append(add_prefix(key))
+                stale.append(add_prefix(key, 'thumbnails'))
+                stale.extend(add_prefix(thumbnail_key)
+                             for thumbnail_key in thumbnail_keys)
+        return live, stale
+
+    def collect_thumbnails(self, live):
+        """Удаляет из media/cache файлы, которых нет среди живых миниатюр."""
+        count = size = 0
+        path = thumbnail_settings.THUMBNAIL_PREFIX.rstrip('/')
+        files = self.old_files(self.thumbnail_storage, path)
+        for batch in chunked(files, self.batch_size):
+            orphans = []
+            for name, bytes_ in batch:
+                base = RESOLUTION_SUFFIX.sub('', name)
+                key = ImageFile(base, self.thumbnail_storage).key
+                if key not in live:
+                    orphans.append((name, key))
+                    size += bytes_
+            count += len(orphans)
+            if self.dry_run or not orphans:
+                continue
+            default.kvstore._delete_raw(
+                *{add_prefix(key) for _, key in orphans}
+            )
+            for name, _ in orphans:
+                self.thumbnail_storage.delete(name)
+                self.prune_dirs(self.thumbnail_storage, name, path)
+        return count, size
+
+    def prune_dirs(self, storage, name, root):
+        """Убирает опустевшие каталоги cache/ab/cd после удаления файла."""
+        path = posixpath.dirname(name)
+        while path != root:
+            try:
+                os.rmdir(storage.path(path))
+            except OSError:
+                return
+            path = posixpath.dirname(path)
@@ -0,0 +1,56 @@
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from posts.follows import apply_follows, user_ids
+
+ACTIONS = {'follow': True, 'unfollow': False}
+
+
+class Command(BaseCommand):
+    help = (
+        'Применяет подписки и отписки из CSV одной транзакцией. '
+        'Строки: читатель,автор[,follow|unfollow]; по умолчанию follow.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл CSV или - для stdin.')
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        if options['path'] == '-':
+            rows = list(csv.reader(sys.stdin))
+        else:
+            with open(options['path'], newline='', encoding='utf-8') as file:
+                rows = list(csv.reader(file))
+        operations = []
+        for line, row in enumerate(rows, 1):
+            if not row:
+                continue
+            action = row[2].strip() if len(row) > 2 else 'follow'
+            if len(row) < 2 or action not in ACTIONS:
+                raise CommandError(f'Строка {line}: {",".join(row)}')
+            operations.append((row[0].strip(), row[1].strip(), action))
+
+        ids = user_ids(
+            name for user, author, _ in operations for name in (user, author)
+        )
+        unknown = {
+            name for user, author, _ in operations
+            for name in (user, author) if name not in ids
+        }
+        followed, unfollowed = apply_follows(
+            ((ids[user], ids[author]), ACTIONS[action])
+            for user, author, action in operations
+            if user in ids and author in ids
+        )
+        elapsed = time.monotonic() - start
+        self.stdout.write(
+            f'Подписок применено: {followed}, удалено: {unfollowed}, '
+            f'неизвестных пользователей: {len(unknown)}'
+        )
+        self.stdout.write(
+            f'{len(operations)} операций за {elapsed:.2f} с '
+            f'({len(operations) / max(elapsed, 1e-9):.0f} в секунду)'
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from posts.months import rebuild_month_counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает число постов по месяцам для архива '
+        'главной, групп и авторов.'
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild_month_counts()
+        self.stdout.write(f'Записано месяцев: {rows}')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+from posts.models import Post
+from posts.utils import chunked
+
+
+class Command(BaseCommand):
+    help = 'Сверяет Post.comment_count с числом комментариев и чинит дрейф.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, у скольких постов счётчик разошёлся.',
+        )
+
+    def handle(self, *args, **options):
+        drifted = Post.objects.order_by().annotate(
+            actual=Count('comments')
+        ).exclude(comment_count=F('actual')).values_list('pk', 'actual')
+        by_count = {}
+        for pk, actual in drifted.iterator():
+            by_count.setdefault(actual, []).append(pk)
+        fixed = sum(len(post_ids) for post_ids in by_count.values())
+        if not options['dry_run']:
+            for actual, post_ids in by_count.items():
+                for batch in chunked(post_ids, 500):
+                    Post.objects.filter(pk__in=batch).update(
+                        comment_count=actual
+                    )
+        verb = 'Будет исправлено' if options['dry_run'] else 'Исправлено'
+        self.stdout.write(f'{verb} счётчиков: {fixed}')
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+from posts.post_cache import invalidate_posts
+from posts.rendering import RENDERER_VERSION, render_objects
+
+MODELS = (
+    (Post, True),
+    (ArchivedPost, True),
+    (Comment, False),
+    (ArchivedComment, False),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Перерисовывает HTML постов и комментариев, отрисованных '
+        'старой версией рендерера. Идёт пачками по первичному ключу, '
+        'каждая пачка — своя транзакция, поэтому его можно запускать '
+        'фоном на работающем сайте.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перерисовать всё, например чтобы связать упоминания '
+                 'с новыми пользователями.',
+        )
+
+    def handle(self, *args, **options):
+        for model, posts in MODELS:
+            count = self.rerender(model, posts, **options)
+            self.stdout.write(
+                f'{model.__name__}: перерисовано {count}'
+            )
+
+    def rerender(self, model, posts, batch_size, **options):
+        queryset = model.objects.only('id', 'text').order_by('pk')
+        if not options['all']:
+            queryset = queryset.filter(text_version__lt=RENDERER_VERSION)
+        count = last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return count
+            render_objects(batch, posts)
+            fields = ['text_html', 'text_version']
+            if posts:
+                fields += ['excerpt', 'excerpt_truncated']
+            with transaction.atomic():
+                # Объект могли поправить после чтения: его HTML уже
+                # нарисован при сохранении, и рендер старого текста
+                # не должен его затереть.
+                texts = dict(model.objects.select_for_update().filter(
+                    pk__in=[obj.pk for obj in batch]
+                ).values_list('pk', 'text'))
+                unchanged = [
+                    obj for obj in batch if texts.get(obj.pk) == obj.text
+                ]
+                model.objects.bulk_update(unchanged, fields)
+                if model is Post:
+                    invalidate_posts([post.pk for post in unchanged])
+            count += len(unchanged)
+            last_pk = batch[-1].pk
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from posts.notifications import trim_notifications
+
+
+class Command(BaseCommand):
+    help = 'Удаляет уведомления старше --days дней.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.NOTIFICATIONS_KEEP_DAYS,
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = trim_notifications(
+            timezone.now() - timedelta(days=options['days']),
+            options['batch_size'],
+        )
+        self.stdout.write(f'Удалено уведомлений: {deleted}')
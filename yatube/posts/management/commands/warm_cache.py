@@ -0,0 +1,137 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+def page_urls(url, count, pages):
+    """Первые страницы ленты, но не дальше последней существующей."""
+    last = max(1, math.ceil(count / settings.NUMBER_OF_PAGINATOR))
+    return [url] + [f'{url}?page={page}'
+                    for page in range(2, min(pages, last) + 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кеши после деплоя: открывает горячие страницы '
+        'тестовым клиентом в несколько потоков. Заполняются миниатюры '
+        'и их записи в sorl, XML лент в общем кеше и кеш страниц базы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=3,
+            help='Сколько первых страниц каждой ленты открыть.',
+        )
+        parser.add_argument(
+            '--groups',
+            type=int,
+            default=10,
+            help='Сколько самых больших групп прогреть.',
+        )
+        parser.add_argument(
+            '--profiles',
+            type=int,
+            default=10,
+            help='Сколько профилей с наибольшим числом подписчиков.',
+        )
+        parser.add_argument(
+            '--posts',
+            type=int,
+            default=50,
+            help='Сколько самых обсуждаемых постов открыть.',
+        )
+        parser.add_argument(
+            '--url',
+            action='append',
+            default=[],
+            help='Дополнительный адрес; можно указать несколько раз.',
+        )
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument(
+            '--host',
+            default=settings.ALLOWED_HOSTS[0],
+            help='Хост, под которым страницы будут запрашивать читатели.',
+        )
+        parser.add_argument('--https', action='store_true')
+
+    def handle(self, *args, **options):
+        urls = self.hot_urls(**options) + options['url']
+        self.local = threading.local()
+        self.host = options['host']
+        self.secure = options['https']
+        start = time.monotonic()
+        with ThreadPoolExecutor(options['workers']) as pool:
+            results = list(pool.map(self.warm, urls))
+        failed = [(url, status) for url, status, _ in results
+                  if status != 200]
+        for url, status in failed:
+            self.stderr.write(f'{status} {url}')
+        self.stdout.write(
+            f'Прогрето страниц: {len(results) - len(failed)} из '
+            f'{len(results)} за {time.monotonic() - start:.1f} с'
+        )
+        for url, _, duration in sorted(
+                results, key=lambda result: -result[2])[:5]:
+            self.stdout.write(f'{duration * 1000:8.0f} мс  {url}')
+
+    def hot_urls(self, pages, groups, profiles, posts, **options):
+        urls = page_urls(reverse('posts:index'), Post.objects.count(), pages)
+        urls += [reverse('posts:feed_rss'), reverse('posts:feed_atom')]
+        for group in Group.objects.annotate(
+                count=Count('posts')).order_by('-count')[:groups]:
+            kwargs = {'slug': group.slug}
+            urls += page_urls(
+                reverse('posts:group_list', kwargs=kwargs), group.count, pages
+            )
+            urls += [reverse('posts:group_rss', kwargs=kwargs),
+                     reverse('posts:group_atom', kwargs=kwargs)]
+        for author in User.objects.annotate(
+                followers=Count('following', distinct=True),
+                count=Count('posts', distinct=True),
+        ).filter(count__gt=0).order_by('-followers', '-count')[:profiles]:
+            kwargs = {'username': author.username}
+            urls += page_urls(
+                reverse('posts:profile', kwargs=kwargs), author.count, pages
+            )
+            urls += [reverse('posts:profile_rss', kwargs=kwargs),
+                     reverse('posts:profile_atom', kwargs=kwargs)]
+        # Счётчика просмотров нет: самые читаемые — самые обсуждаемые.
+        urls += [
+            reverse('posts:post_detail', kwargs={'post_id': pk})
+            for pk in Post.objects.annotate(
+                count=Count('comments')
+            ).order_by('-count', '-created').values_list('pk', flat=True)[
+                :posts
+            ]
+        ]
+        return urls
+
+    def warm(self, url):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            # Адрес не из INTERNAL_IPS, чтобы не включалась debug toolbar.
+            client = self.local.client = Client(
+                HTTP_HOST=self.host, REMOTE_ADDR='10.0.0.1'
+            )
+        start = time.monotonic()
+        try:
+            status = client.get(url, secure=self.secure).status_code
+        except Exception as error:
+            status = repr(error)
+        finally:
+            connections.close_all()
+        return url, status, time.monotonic() - start
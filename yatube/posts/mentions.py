@@ -0,0 +1,76 @@
+import re
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+from .notifications import notify_mentions
+
+User = get_user_model()
+
+# @username: допустимые в имени символы, кроме @; точка или дефис
+# в конце — это уже пунктуация. Адреса почты (a@b.ru) не совпадают.
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.+-]*\w)')
+MENTION_KEY = 'mentions:user:{}'
+USERNAME_MAX_LENGTH = User._meta.get_field('username').max_length
+
+
+def mention_cache():
+    return caches[settings.MENTIONS_CACHE_ALIAS]
+
+
+def extract_mentions(text):
+    return {
+        match.group(1) for match in MENTION_RE.finditer(text)
+        if len(match.group(1)) <= USERNAME_MAX_LENGTH
+    }
+
+
+def resolve_usernames(names):
+    """Существующие пользователи среди names: {username: id}.
+
+    Все имена читаются из кеша одним get_many, промахи — одним
+    запросом username__in. Несуществующие имена тоже кешируются,
+    чтобы опечатки не ходили в базу на каждый показ.
+    """
+    keys = {MENTION_KEY.format(name): name for name in names}
+    if not keys:
+        return {}
+    cached = mention_cache().get_many(keys)
+    found = {keys[key]: pk for key, pk in cached.items() if pk}
+    missing = [name for key, name in keys.items() if key not in cached]
+    if missing:
+        rows = dict(User.objects.filter(
+            username__in=missing
+        ).values_list('username', 'pk'))
+        mention_cache().set_many(
+            {MENTION_KEY.format(name): rows.get(name, 0)
+             for name in missing},
+            settings.MENTIONS_CACHE_SECONDS,
+        )
+        found.update(rows)
+    return found
+
+
+def mentioned_users(texts):
+    """Упомянутые в texts существующие пользователи: {username: id}."""
+    names = set()
+    for text in texts:
+        names |= extract_mentions(text)
+    return resolve_usernames(names)
+
+
+def remember_user(user, exists=True):
+    mention_cache().set(
+        MENTION_KEY.format(user.username),
+        user.pk if exists else 0,
+        settings.MENTIONS_CACHE_SECONDS,
+    )
+
+
+def notify_mentioned(post_id, author_id, names):
+    """Уведомляет существующих пользователей из names, кроме автора."""
+    users = resolve_usernames(names)
+    notify_mentions(
+        post_id, [pk for pk in users.values() if pk != author_id]
+    )
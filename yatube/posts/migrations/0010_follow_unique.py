@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:11
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    """Оставляет по одной подписке на каждую пару читатель — автор."""
+    Follow = apps.get_model('posts', 'Follow')
+    keep = Follow.objects.values('user', 'author').annotate(
+        first=Min('id')
+    ).values('first')
+    Follow.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_auto_20261019_0853'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_follows, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_counts(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    Post = apps.get_model('posts', 'Post')
+    counts = Comment.objects.filter(
+        post=OuterRef('pk')
+    ).order_by().values('post').annotate(count=Count('pk')).values('count')
+    Post.objects.update(comment_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число комментариев'),
+        ),
+        migrations.RunPython(fill_comment_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:19
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def fill_month_counts(apps, schema_editor):
+    MonthlyPostCount = apps.get_model('posts', 'MonthlyPostCount')
+    counts = Counter()
+    for name in ('Post', 'ArchivedPost'):
+        rows = apps.get_model('posts', name).objects.order_by().annotate(
+            month=TruncMonth('created')
+        ).values('author_id', 'group_id', 'month').annotate(count=Count('pk'))
+        for row in rows:
+            month = timezone.localtime(row['month'])
+            scopes = ['index', f'author:{row["author_id"]}']
+            if row['group_id'] is not None:
+                scopes.append(f'group:{row["group_id"]}')
+            for scope in scopes:
+                counts[scope, month.year, month.month] += row['count']
+    MonthlyPostCount.objects.bulk_create(
+        [
+            MonthlyPostCount(scope=scope, year=year, month=month, count=count)
+            for (scope, year, month), count in counts.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyPostCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=100, verbose_name='Лента')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Год')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Месяц')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Число постов')),
+            ],
+            options={
+                'ordering': ['-year', '-month'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(fields=['created'], name='archived_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(fields=['group', 'created'], name='archived_group_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(fields=['author', 'created'], name='archived_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['created'], name='post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', 'created'], name='post_group_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'created'], name='post_author_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlypostcount',
+            constraint=models.UniqueConstraint(fields=('scope', 'year', 'month'), name='unique_month_count'),
+        ),
+        migrations.RunPython(fill_month_counts, migrations.RunPython.noop),
+    ]
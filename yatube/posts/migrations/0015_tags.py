@@ -0,0 +1,75 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:23
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+TAG_RE = re.compile(r'(?<![\w#])#(\w*[^\W\d_]\w*)')
+
+
+def fill_tags(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Tag = apps.get_model('posts', 'Tag')
+    PostTag = apps.get_model('posts', 'PostTag')
+    names_by_post = {}
+    for post in Post.objects.only('text', 'created').iterator():
+        names = {
+            name.casefold() for name in TAG_RE.findall(post.text)
+            if len(name) <= 50
+        }
+        if names:
+            names_by_post[post] = names
+    all_names = set().union(*names_by_post.values())
+    Tag.objects.bulk_create([Tag(name=name) for name in all_names])
+    tags = dict(Tag.objects.values_list('name', 'pk'))
+    PostTag.objects.bulk_create(
+        [
+            PostTag(post=post, tag_id=tags[name], created=post.created)
+            for post, names in names_by_post.items()
+            for name in names
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_month_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Тег')),
+            ],
+            options={
+                'verbose_name': 'Тег',
+                'verbose_name_plural': 'Теги',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(verbose_name='Дата поста')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='posts.Post')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='posts.Tag')),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='posttag',
+            index=models.Index(fields=['tag', '-created'], name='posttag_tag_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='posttag',
+            constraint=models.UniqueConstraint(fields=('post', 'tag'), name='unique_post_tag'),
+        ),
+        migrations.RunPython(fill_tags, migrations.RunPython.noop),
+    ]
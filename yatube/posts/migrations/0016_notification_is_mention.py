@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='is_mention',
+            field=models.BooleanField(default=False, verbose_name='Упоминание'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_notification_is_mention'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='text_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия рендерера'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='text_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия рендерера'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия рендерера'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия рендерера'),
+        ),
+    ]
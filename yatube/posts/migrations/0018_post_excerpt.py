@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:29
+
+from django.db import migrations, models
+
+
+def reset_post_html(apps, schema_editor):
+    """Посты без отрывка рисуются на лету до manage.py rerender_text."""
+    for name in ('Post', 'ArchivedPost'):
+        apps.get_model('posts', name).objects.update(text_version=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML отрывка'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='excerpt_truncated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Текст обрезан'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML отрывка'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_truncated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Текст обрезан'),
+        ),
+        migrations.RunPython(reset_post_html, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='spool_id',
+            field=models.UUIDField(editable=False, null=True, unique=True, verbose_name='Сообщение очереди'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from core.models import CreatedModel
+from core.storage import ContentAddressedStorage
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import DatabaseError, models, router, transaction
 
 User = get_user_model()
 
@@ -16,6 +17,21 @@ class Group(models.Model):
 
 class Post(CreatedModel):
     text = models.TextField()
+    # HTML текста рисуется один раз при сохранении; строки со старой
+    # версией рендерера перерисовывает manage.py rerender_text.
+    text_html = models.TextField('HTML текста', blank=True, editable=False)
+    text_version = models.PositiveSmallIntegerField(
+        'Версия рендерера',
+        default=0,
+        editable=False
+    )
+    # Отрывок для лент: ленты читают его вместо полного текста.
+    excerpt = models.TextField('HTML отрывка', blank=True, editable=False)
+    excerpt_truncated = models.BooleanField(
+        'Текст обрезан',
+        default=False,
+        editable=False
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -31,17 +47,75 @@ class Post(CreatedModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    # Ведётся сигналами комментариев; дрейф чинит manage.py
+    # reconcile_comment_counts.
+    comment_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         ordering = ["-created"]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # Выборки по диапазону дат для архива по месяцам.
+        indexes = [
+            models.Index(fields=['created'], name='post_created_idx'),
+            models.Index(
+                fields=['group', 'created'], name='post_group_created_idx'
+            ),
+            models.Index(
+                fields=['author', 'created'], name='post_author_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # Счётчик комментариев меняется только через F(), иначе
+        # сохранение поста с устаревшим значением затрёт чужие изменения.
+        # Отложенные поля, как и в обычном save(), не пишутся.
+        if (self._state.adding or args or kwargs.get('force_insert')
+                or kwargs.get('update_fields') is not None):
+            return super().save(*args, **kwargs)
+        deferred = self.get_deferred_fields()
+        update_fields = [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name != 'comment_count'
+            and field.attname not in deferred
+        ]
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        try:
+            with transaction.atomic(using=using):
+                return super().save(update_fields=update_fields, **kwargs)
+        except DatabaseError:
+            # Строку успели удалить: с update_fields Django падает,
+            # а обычное сохранение вставляет её заново.
+            if type(self)._base_manager.using(using).filter(
+                pk=self.pk
+            ).exists():
+                raise
+        return super().save(**kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем картинку, чтобы при замене снять ссылку со старой,
+        # группу, чтобы при переносе поста обновить и её ленту, и текст,
+        # чтобы не пересобирать теги, если он не менялся.
+        image = instance.__dict__.get('image')
+        instance._loaded_image = getattr(image, 'name', image) or ''
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        instance._loaded_text = instance.__dict__.get('text')
+        return instance
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -60,7 +134,28 @@ class Comment(models.Model):
         verbose_name='Текст',
         help_text='Текст нового комментария'
     )
+    text_html = models.TextField('HTML текста', blank=True, editable=False)
+    text_version = models.PositiveSmallIntegerField(
+        'Версия рендерера',
+        default=0,
+        editable=False
+    )
     created = models.DateTimeField(auto_now_add=True)
+    # Сообщение очереди отложенной записи: повторная доставка того же
+    # сообщения не создаст второй комментарий.
+    spool_id = models.UUIDField(
+        'Сообщение очереди',
+        null=True,
+        unique=True,
+        editable=False
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем текст, чтобы не перерисовывать HTML без правки.
+        instance._loaded_text = instance.__dict__.get('text')
+        return instance
 
 
 class Follow(models.Model):
@@ -74,3 +169,193 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following'
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+        ]
+
+
+class Notification(CreatedModel):
+    """Уведомление о посте: новом у автора из подписок или с упоминанием.
+
+    Упоминание в посте или в комментарии к нему помечает
+    уведомление is_mention.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    is_read = models.BooleanField('Прочитано', default=False)
+    is_mention = models.BooleanField('Упоминание', default=False)
+
+    class Meta:
+        ordering = ['-created']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_notification'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'is_read'], name='notification_unread_idx'
+            ),
+        ]
+
+
+class Tag(models.Model):
+    """Хештег из текста поста, в нижнем регистре и без решётки."""
+    name = models.CharField('Тег', max_length=50, unique=True)
+
+    class Meta:
+        verbose_name = 'Тег'
+        verbose_name_plural = 'Теги'
+
+    def __str__(self):
+        return self.name
+
+
+class PostTag(models.Model):
+    """Связь поста с тегом — обратный индекс для лент тегов.
+
+    Дата поста скопирована сюда, чтобы лента тега читалась
+    по индексу (tag, -created) без сортировки постов.
+    """
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags'
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags'
+    )
+    created = models.DateTimeField('Дата поста')
+
+    class Meta:
+        ordering = ['-created']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'tag'], name='unique_post_tag'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['tag', '-created'], name='posttag_tag_created_idx'
+            ),
+        ]
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый из горячей таблицы manage.py archive_posts.
+
+    Хранит тот же id, поэтому старые ссылки на пост продолжают работать.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField()
+    text_html = models.TextField('HTML текста', blank=True, editable=False)
+    text_version = models.PositiveSmallIntegerField(
+        'Версия рендерера',
+        default=0,
+        editable=False
+    )
+    excerpt = models.TextField('HTML отрывка', blank=True, editable=False)
+    excerpt_truncated = models.BooleanField(
+        'Текст обрезан',
+        default=False,
+        editable=False
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        storage=ContentAddressedStorage(),
+        blank=True
+    )
+    comment_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0
+    )
+    created = models.DateTimeField('Дата создания')
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+        indexes = [
+            models.Index(fields=['created'], name='archived_created_idx'),
+            models.Index(
+                fields=['group', 'created'],
+                name='archived_group_created_idx'
+            ),
+            models.Index(
+                fields=['author', 'created'],
+                name='archived_author_created_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    text = models.TextField(verbose_name='Текст')
+    text_html = models.TextField('HTML текста', blank=True, editable=False)
+    text_version = models.PositiveSmallIntegerField(
+        'Версия рендерера',
+        default=0,
+        editable=False
+    )
+    created = models.DateTimeField()
+
+
+class MonthlyPostCount(models.Model):
+    """Число постов за месяц в ленте scope: главной, группы или автора.
+
+    Учитывает и горячие, и архивные посты. Ведётся сигналами Post;
+    пересчитать с нуля можно manage.py rebuild_month_counts.
+    """
+    scope = models.CharField('Лента', max_length=100)
+    year = models.PositiveSmallIntegerField('Год')
+    month = models.PositiveSmallIntegerField('Месяц')
+    count = models.PositiveIntegerField('Число постов', default=0)
+
+    class Meta:
+        ordering = ['-year', '-month']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'year', 'month'], name='unique_month_count'
+            ),
+        ]
@@ -0,0 +1,89 @@
+import datetime
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import ArchivedPost, MonthlyPostCount, Post
+
+
+def post_scopes(author_id, group_id):
+    """Ленты, в которые попадает пост автора author_id в группе group_id."""
+    scopes = ['index', f'author:{author_id}']
+    if group_id is not None:
+        scopes.append(f'group:{group_id}')
+    return scopes
+
+
+def month_range(year, month):
+    """Начало месяца и начало следующего в текущем часовом поясе."""
+    start = datetime.datetime(year, month, 1)
+    if month == 12:
+        end = datetime.datetime(year + 1, 1, 1)
+    else:
+        end = datetime.datetime(year, month + 1, 1)
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def bump_month_counts(scopes, created, delta):
+    """Меняет счётчики месяца created в лентах scopes на delta.
+
+    Счётчик не уходит ниже нуля: после правки дат мимо сигналов,
+    смены часового пояса или переноса в архив он мог разойтись
+    с постами, и удаление поста не должно из-за этого падать. Дрейф
+    чинит manage.py rebuild_month_counts.
+    """
+    created = timezone.localtime(created)
+    for scope in scopes:
+        rows = MonthlyPostCount.objects.filter(
+            scope=scope, year=created.year, month=created.month
+        )
+        if delta > 0:
+            MonthlyPostCount.objects.get_or_create(
+                scope=scope, year=created.year, month=created.month
+            )
+        else:
+            rows = rows.filter(count__gte=-delta)
+        rows.update(count=F('count') + delta)
+
+
+def month_navigation(scope):
+    """Месяцы с постами по годам: [(год, [(дата, число постов)])]."""
+    years = []
+    for row in MonthlyPostCount.objects.filter(scope=scope, count__gt=0):
+        if not years or years[-1][0] != row.year:
+            years.append((row.year, []))
+        years[-1][1].append((datetime.date(row.year, row.month, 1), row.count))
+    return years
+
+
+def rebuild_month_counts():
+    """Пересчитывает MonthlyPostCount по горячим и архивным постам.
+
+    Возвращает число записанных строк.
+    """
+    counts = Counter()
+    for model in (Post, ArchivedPost):
+        rows = model.objects.order_by().annotate(
+            month=TruncMonth('created')
+        ).values('author_id', 'group_id', 'month').annotate(
+            count=Count('pk')
+        )
+        for row in rows.iterator():
+            month = timezone.localtime(row['month'])
+            for scope in post_scopes(row['author_id'], row['group_id']):
+                counts[scope, month.year, month.month] += row['count']
+    with transaction.atomic():
+        MonthlyPostCount.objects.all().delete()
+        MonthlyPostCount.objects.bulk_create(
+            (
+                MonthlyPostCount(
+                    scope=scope, year=year, month=month, count=count
+                )
+                for (scope, year, month), count in counts.items()
+            ),
+            batch_size=500,
+        )
+    return len(counts)
@@ -0,0 +1,135 @@
+from core.spool import Spool
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max
+
+from .models import Follow, Notification, Post
+from .utils import chunked
+
+spool = Spool('notifications')
+
+UNREAD_KEY = 'notifications:unread:{}'
+
+
+def counter_cache():
+    return caches[settings.NOTIFICATIONS_CACHE_ALIAS]
+
+
+def unread_count(user):
+    """Число непрочитанных уведомлений: одно чтение из кеша.
+
+    При промахе счётчик пересчитывается одним COUNT по индексу
+    (user, is_read) и кладётся обратно.
+    """
+    key = UNREAD_KEY.format(user.pk)
+    count = counter_cache().get(key)
+    if count is None:
+        count = Notification.objects.filter(user=user, is_read=False).count()
+        counter_cache().set(key, count, settings.NOTIFICATIONS_COUNT_SECONDS)
+    return count
+
+
+def reset_unread_counts(user_ids):
+    counter_cache().delete_many(
+        [UNREAD_KEY.format(user_id) for user_id in user_ids]
+    )
+
+
+def enqueue_fanout(post):
+    """Ставит в очередь одну задачу рассылки на новый пост.
+
+    Авторы без подписчиков в очередь не попадают.
+    """
+    if Follow.objects.filter(author_id=post.author_id).exists():
+        spool.put(
+            {'post_id': post.id, 'author_id': post.author_id},
+            key=post.author_id,
+        )
+
+
+def fan_out(post_id, author_id, batch_size):
+    """Пишет уведомления всем подписчикам автора пачками.
+
+    Повторный запуск задачи безопасен: уже созданные уведомления
+    пропускаются благодаря уникальности (user, post).
+    """
+    if not Post.objects.filter(pk=post_id).exists():
+        return 0
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True).iterator()
+    sent = 0
+    for batch in chunked(followers, batch_size):
+        with transaction.atomic():
+            Notification.objects.bulk_create(
+                [Notification(user_id=user_id, post_id=post_id)
+                 for user_id in batch],
+                ignore_conflicts=True,
+            )
+        reset_unread_counts(batch)
+        sent += len(batch)
+    return sent
+
+
+def notify_mentions(post_id, user_ids):
+    """Уведомляет упомянутых в посте или комментарии к нему.
+
+    Если уведомление о посте уже есть, оно помечается упоминанием
+    и снова становится непрочитанным.
+    """
+    if not user_ids:
+        return
+    with transaction.atomic():
+        Notification.objects.bulk_create(
+            [Notification(user_id=user_id, post_id=post_id, is_mention=True)
+             for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+        Notification.objects.filter(
+            user_id__in=user_ids, post_id=post_id
+        ).update(is_mention=True, is_read=False)
+    reset_unread_counts(user_ids)
+
+
+def process_fanouts(limit, batch_size):
+    """Выполняет до limit задач из очереди. Возвращает число задач."""
+    claimed = spool.claim(limit)
+    for path, payload in claimed:
+        fan_out(payload['post_id'], payload['author_id'], batch_size)
+        spool.ack([path])
+    return len(claimed)
+
+
+def mark_read(user):
+    Notification.objects.filter(user=user, is_read=False).update(
+        is_read=True
+    )
+    counter_cache().set(
+        UNREAD_KEY.format(user.pk), 0, settings.NOTIFICATIONS_COUNT_SECONDS
+    )
+
+
+def trim_notifications(before, batch_size):
+    """Удаляет уведомления старше before пачками.
+
+    Уведомления создаются по возрастанию id, поэтому граница по дате
+    ищется один раз, а удаляется всё по первичному ключу до неё.
+    Возвращает число удалённых уведомлений.
+    """
+    edge = Notification.objects.filter(
+        created__lt=before
+    ).aggregate(edge=Max('id'))['edge']
+    deleted = 0
+    while edge is not None:
+        rows = list(Notification.objects.filter(
+            pk__lte=edge
+        ).order_by('pk').values_list('pk', 'user_id', 'is_read')[
+            :batch_size
+        ])
+        if not rows:
+            break
+        Notification.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+        reset_unread_counts({user_id for _, user_id, read in rows if not read})
+        deleted += len(rows)
+    return deleted
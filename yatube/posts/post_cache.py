@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Post
+
+POST_KEY = 'posts:detail:{}'
+# Число постов автора лежит отдельно от постов: новый пост меняет
+# только его, а не страницы всех постов автора.
+AUTHOR_COUNT_KEY = 'posts:author_count:{}'
+
+# Автор нужен странице поста только для отображения: в кеш не
+# попадают ни хеш пароля, ни прочие служебные поля пользователя.
+POST_FIELDS = (
+    'id', 'text', 'text_html', 'text_version', 'created', 'image',
+    'comment_count', 'author', 'group',
+    'author__username', 'author__first_name', 'author__last_name',
+    'group__title', 'group__slug',
+)
+
+
+def post_cache():
+    return caches[settings.POST_CACHE_ALIAS]
+
+
+def invalidate_keys(keys):
+    """Удаляет ключи сразу и ещё раз после коммита: между этими
+    моментами параллельный запрос мог положить в кеш старую версию.
+    """
+    if not keys:
+        return
+    post_cache().delete_many(keys)
+    transaction.on_commit(lambda: post_cache().delete_many(keys))
+
+
+def invalidate_posts(post_ids):
+    """Сбрасывает закешированные страницы постов."""
+    invalidate_keys([POST_KEY.format(pk) for pk in post_ids])
+
+
+def invalidate_author_count(author_id):
+    invalidate_keys([AUTHOR_COUNT_KEY.format(author_id)])
+
+
+def invalidate_author_posts(author_id):
+    invalidate_posts(
+        Post.objects.filter(author_id=author_id).values_list('pk', flat=True)
+    )
+
+
+def invalidate_group_posts(group_id):
+    invalidate_posts(
+        Post.objects.filter(group_id=group_id).values_list('pk', flat=True)
+    )
@@ -0,0 +1,147 @@
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.html import escape, format_html
+
+from .mentions import MENTION_RE, mentioned_users
+from .tags import TAG_MAX_LENGTH, TAG_RE, normalize_tag
+
+# Номер версии рендерера. Поднимается при любом изменении вывода;
+# manage.py rerender_text перерисовывает строки со старой версией.
+RENDERER_VERSION = 1
+
+PARAGRAPH_RE = re.compile(r'\n\s*\n')
+WORD_END_RE = re.compile(r'(.*\S)\s', re.DOTALL)
+URL_RE = re.compile(r'https?://[^\s<>"]*[^\s<>".,;:!?)\]\'"]')
+INLINE_RE = re.compile(
+    '|'.join((
+        TAG_RE.pattern,
+        MENTION_RE.pattern,
+        f'({URL_RE.pattern})',
+        r'\*\*(\S(?:.*?\S)?)\*\*',
+        r'(?<![\w*])\*(\S(?:.*?\S)?)\*(?![\w*])',
+        r'`([^`\n]+)`',
+    ))
+)
+
+
+def render_inline(text, mentions, tags):
+    """Экранирует строку и размечает ссылки, **жирный**, *курсив*, `код`.
+
+    Весь пользовательский текст проходит через escape, HTML
+    добавляет только сам рендерер, поэтому результат безопасен.
+    Ссылкой становятся только имена из mentions.
+    """
+    parts = []
+    position = 0
+    for match in INLINE_RE.finditer(text):
+        tag, username, url, strong, emphasis, code = match.groups()
+        if tag is not None:
+            if not tags or len(tag) > TAG_MAX_LENGTH:
+                continue
+            html = format_html(
+                '<a href="{}">{}</a>',
+                reverse('posts:tag_posts', args=[normalize_tag(tag)]),
+                match.group(0),
+            )
+        elif username is not None:
+            if username not in mentions:
+                continue
+            html = format_html(
+                '<a href="{}">{}</a>',
+                reverse('posts:profile', args=[username]),
+                match.group(0),
+            )
+        elif url is not None:
+            html = format_html(
+                '<a href="{}" rel="nofollow noopener">{}</a>', url, url
+            )
+        elif strong is not None:
+            html = format_html('<strong>{}</strong>', strong)
+        elif emphasis is not None:
+            html = format_html('<em>{}</em>', emphasis)
+        else:
+            html = format_html('<code>{}</code>', code)
+        parts.append(escape(text[position:match.start()]))
+        parts.append(html)
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return ''.join(parts)
+
+
+def render_text(text, mentions=None, tags=True):
+    """HTML текста: абзацы по пустым строкам, переносы — <br>."""
+    mentions = mentions or {}
+    paragraphs = PARAGRAPH_RE.split(text.replace('\r\n', '\n').strip())
+    return ''.join(
+        '<p>{}</p>'.format('<br>'.join(
+            render_inline(line, mentions, tags)
+            for line in paragraph.split('\n')
+        ))
+        for paragraph in paragraphs if paragraph
+    )
+
+
+def make_excerpt(text):
+    """Начало текста не длиннее POST_EXCERPT_LENGTH по границе слова.
+
+    Возвращает пару: отрывок и признак, что текст обрезан.
+    """
+    text = text.strip()
+    limit = settings.POST_EXCERPT_LENGTH
+    if len(text) <= limit:
+        return text, False
+    # Последний пробел в пределах лимита; слово без пробелов режется.
+    match = WORD_END_RE.match(text[:limit + 1])
+    head = match.group(1) if match else text[:limit]
+    return head.rstrip('.,;:!?-') + '…', True
+
+
+def render_excerpt(text, mentions=None):
+    excerpt, truncated = make_excerpt(text)
+    return render_text(excerpt, mentions), truncated
+
+
+def render_objects(objects, posts):
+    """Заполняет HTML текста и text_version у постов или комментариев.
+
+    Постам ещё рисуется отрывок для лент, а #теги становятся
+    ссылками. Упоминания всех объектов разрешаются одним вызовом.
+    """
+    mentions = mentioned_users(obj.text for obj in objects)
+    for obj in objects:
+        obj.text_html = render_text(obj.text, mentions, tags=posts)
+        if posts:
+            obj.excerpt, obj.excerpt_truncated = render_excerpt(
+                obj.text, mentions
+            )
+        obj.text_version = RENDERER_VERSION
+
+
+def load_unrendered_texts(objects):
+    """Дочитывает отложенный текст неотрисованных объектов.
+
+    Ленты не читают text, но строкам из bulk_create или со сброшенной
+    миграцией версией он нужен для отрисовки на лету. Тексты
+    загружаются одним запросом на модель, а не по запросу на объект.
+    """
+    missing = defaultdict(lambda: defaultdict(list))
+    for obj in objects:
+        if not obj.text_version and 'text' in obj.get_deferred_fields():
+            missing[type(obj)][obj.pk].append(obj)
+    for model, objects_by_pk in missing.items():
+        texts = model._base_manager.filter(
+            pk__in=objects_by_pk
+        ).values_list('pk', 'text')
+        for pk, text in texts:
+            for obj in objects_by_pk[pk]:
+                obj.text = text
+
+
+def unrendered_texts(objects):
+    """Тексты объектов, ещё ни разу не отрисованных при сохранении."""
+    objects = list(objects)
+    load_unrendered_texts(objects)
+    return [obj.text for obj in objects if not obj.text_version]
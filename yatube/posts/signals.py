@@ -0,0 +1,263 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from .feeds import touch_feeds
+from .mentions import extract_mentions, notify_mentioned, remember_user
+from .models import (ArchivedPost, Comment, Group, MonthlyPostCount,
+                     Notification, Post)
+from .months import bump_month_counts, post_scopes
+from .notifications import enqueue_fanout, reset_unread_counts
+from .post_cache import (invalidate_author_count, invalidate_author_posts,
+                         invalidate_group_posts, invalidate_posts)
+from .rendering import RENDERER_VERSION, render_objects
+from .tags import sync_tags
+
+User = get_user_model()
+
+
+def release_image(image, name):
+    if name and hasattr(image.storage, 'release'):
+        image.storage.release(name)
+
+
+@receiver(pre_save, sender=Post)
+def remember_replaced_image(sender, instance, **kwargs):
+    """Отмечает старую картинку, если пост сохраняется с новой."""
+    old = getattr(instance, '_loaded_image', '')
+    new = instance.image
+    if old and (not new or not new._committed or new.name != old):
+        instance._replaced_image = old
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def render_text_html(sender, instance, **kwargs):
+    """Рисует HTML текста, если текст или версия рендерера сменились."""
+    if (instance.text_version == RENDERER_VERSION
+            and instance.text == getattr(instance, '_loaded_text', None)):
+        return
+    render_objects([instance], posts=sender is Post)
+
+
+@receiver(pre_save, sender=Post)
+def remember_new_mentions(sender, instance, **kwargs):
+    """Отмечает упоминания, которых не было в тексте до правки."""
+    old = '' if instance._state.adding else getattr(
+        instance, '_loaded_text', None
+    )
+    instance._new_mentions = (
+        extract_mentions(instance.text) - extract_mentions(old or '')
+    )
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, **kwargs):
+    release_image(instance.image, instance.__dict__.pop('_replaced_image', ''))
+    instance._loaded_image = instance.image.name or ''
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def release_deleted_image(sender, instance, **kwargs):
+    release_image(instance.image, instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    """Учитывает новый пост в архиве по месяцам.
+
+    При переносе в другую группу пост переходит между лентами групп.
+    Должен стоять до touch_post_feeds: тот запоминает новую группу.
+    """
+    if created:
+        bump_month_counts(
+            post_scopes(instance.author_id, instance.group_id),
+            instance.created,
+            1,
+        )
+        return
+    old_group_id = getattr(instance, '_loaded_group_id', instance.group_id)
+    if old_group_id != instance.group_id:
+        if old_group_id is not None:
+            bump_month_counts(
+                [f'group:{old_group_id}'], instance.created, -1
+            )
+        if instance.group_id is not None:
+            bump_month_counts(
+                [f'group:{instance.group_id}'], instance.created, 1
+            )
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def count_deleted_post(sender, instance, **kwargs):
+    bump_month_counts(
+        post_scopes(instance.author_id, instance.group_id),
+        instance.created,
+        -1,
+    )
+
+
+@receiver(post_delete, sender=Group)
+def drop_group_month_counts(sender, instance, **kwargs):
+    MonthlyPostCount.objects.filter(scope=f'group:{instance.pk}').delete()
+
+
+def related_values(instance, name, attname, pks):
+    """Значения attname у объектов связи name с ключами pks.
+
+    Уже загруженный связанный объект берётся из памяти, в базу идёт
+    запрос только за остальными ключами.
+    """
+    pks = set(pks) - {None}
+    values = set()
+    field = instance._meta.get_field(name)
+    if field.is_cached(instance):
+        related = getattr(instance, name)
+        if related is not None and related.pk in pks:
+            values.add(getattr(related, attname))
+            pks.discard(related.pk)
+    if pks:
+        values.update(field.related_model.objects.filter(
+            pk__in=pks
+        ).values_list(attname, flat=True))
+    return values
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def touch_post_feeds(sender, instance, **kwargs):
+    """Сбрасывает ленты главной, автора и групп — старой и новой.
+
+    Ленты адресуются по имени автора и slug группы; при обычном
+    сохранении они уже загружены вместе с постом.
+    """
+    group_ids = {
+        instance.group_id, getattr(instance, '_loaded_group_id', None)
+    }
+    scopes = ['index']
+    scopes += [
+        f'author:{username}' for username in related_values(
+            instance, 'author', 'username', [instance.author_id]
+        )
+    ]
+    scopes += [
+        f'group:{slug}'
+        for slug in related_values(instance, 'group', 'slug', group_ids)
+    ]
+    instance._loaded_group_id = instance.group_id
+    transaction.on_commit(lambda: touch_feeds(scopes))
+
+
+@receiver(post_save, sender=Group)
+def touch_group_feed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: touch_feeds([f'group:{instance.slug}']))
+
+
+@receiver(post_save, sender=Post)
+def retag_post(sender, instance, created, **kwargs):
+    """Пересобирает теги, только если текст поста изменился."""
+    if created or instance.text != getattr(instance, '_loaded_text', None):
+        sync_tags(instance, created)
+    instance._loaded_text = instance.text
+
+
+@receiver(post_save, sender=Post)
+def notify_followers(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: enqueue_fanout(instance))
+
+
+@receiver(post_save, sender=Post)
+def notify_mentioned_in_post(sender, instance, **kwargs):
+    names = instance.__dict__.pop('_new_mentions', set())
+    if names:
+        transaction.on_commit(lambda: notify_mentioned(
+            instance.pk, instance.author_id, names
+        ))
+
+
+@receiver(post_save, sender=Comment)
+def notify_mentioned_in_comment(sender, instance, created, **kwargs):
+    names = extract_mentions(instance.text) if created else set()
+    if names:
+        transaction.on_commit(lambda: notify_mentioned(
+            instance.post_id, instance.author_id, names
+        ))
+
+
+@receiver(pre_delete, sender=Post)
+def reset_post_notifications(sender, instance, **kwargs):
+    """Непрочитанные уведомления поста удалятся каскадом — счётчики тоже."""
+    user_ids = list(Notification.objects.filter(
+        post=instance, is_read=False
+    ).values_list('user_id', flat=True))
+    if user_ids:
+        transaction.on_commit(lambda: reset_unread_counts(user_ids))
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1
+    )
+
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post(sender, instance, created, **kwargs):
+    """Новый пост меняет из чужих страниц только число постов автора.
+
+    Свой ключ сбрасывается всегда: общий кеш переживает базу, и после
+    отката транзакции или пересоздания базы новый пост может получить
+    id, под которым в кеше лежит страница другого поста.
+    """
+    invalidate_posts([instance.pk])
+    if created:
+        invalidate_author_count(instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs):
+    invalidate_posts([instance.pk])
+    invalidate_author_count(instance.author_id)
+
+
+@receiver(post_delete, sender=ArchivedPost)
+def invalidate_deleted_archived_post(sender, instance, **kwargs):
+    invalidate_author_count(instance.author_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    invalidate_group_posts(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(sender, instance, update_fields=None, **kwargs):
+    """Имя автора есть на каждой его странице; вход их не меняет."""
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidate_author_posts(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def remember_mentionable(sender, instance, **kwargs):
+    remember_user(instance)
+
+
+@receiver(post_delete, sender=User)
+def forget_mentionable(sender, instance, **kwargs):
+    remember_user(instance, exists=False)
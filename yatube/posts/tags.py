@@ -0,0 +1,52 @@
+import re
+
+from .models import PostTag, Tag
+
+# #тег: буквы, цифры и подчёркивание, хотя бы одна буква. Решётка
+# внутри слова (a#b) или подряд (##) тегом не считается.
+TAG_RE = re.compile(r'(?<![\w#])#(\w*[^\W\d_]\w*)')
+TAG_MAX_LENGTH = Tag._meta.get_field('name').max_length
+
+
+def normalize_tag(name):
+    return name.casefold()
+
+
+def extract_tags(text):
+    """Множество нормализованных тегов из текста."""
+    return {
+        normalize_tag(match.group(1))
+        for match in TAG_RE.finditer(text)
+        if len(match.group(1)) <= TAG_MAX_LENGTH
+    }
+
+
+def get_or_create_tags(names):
+    Tag.objects.bulk_create(
+        [Tag(name=name) for name in names], ignore_conflicts=True
+    )
+    return Tag.objects.filter(name__in=names)
+
+
+def sync_tags(post, created=False):
+    """Приводит теги поста в соответствие с текстом.
+
+    Меняются только разошедшиеся строки: снятые теги удаляются,
+    новые добавляются, остальные не трогаются. У нового поста
+    тегов ещё нет, и текущие не читаются.
+    """
+    names = extract_tags(post.text)
+    current = {} if created else dict(
+        PostTag.objects.filter(post=post).values_list('tag__name', 'pk')
+    )
+    removed = [pk for name, pk in current.items() if name not in names]
+    if removed:
+        PostTag.objects.filter(pk__in=removed).delete()
+    added = names - current.keys()
+    if added:
+        # Параллельное сохранение того же поста могло уже добавить тег.
+        PostTag.objects.bulk_create(
+            [PostTag(post=post, tag=tag, created=post.created)
+             for tag in get_or_create_tags(added)],
+            ignore_conflicts=True,
+        )
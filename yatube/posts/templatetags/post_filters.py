@@ -0,0 +1,44 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..rendering import make_excerpt, render_excerpt, render_text
+
+register = template.Library()
+
+
+def stored_html(obj, mentions, tags):
+    """HTML, отрисованный при сохранении.
+
+    Объекты без него — созданные bulk_create или ещё не записанные
+    в базу — рисуются на лету; упоминания для них view разрешает
+    заранее одним запросом на страницу.
+    """
+    if obj.text_version:
+        return mark_safe(obj.text_html)
+    return mark_safe(render_text(obj.text, mentions, tags))
+
+
+@register.filter
+def post_html(post, mentions=None):
+    return stored_html(post, mentions, True)
+
+
+@register.filter
+def comment_html(comment, mentions=None):
+    """Теги в комментариях не индексируются и ссылками не становятся."""
+    return stored_html(comment, mentions, False)
+
+
+@register.filter
+def post_excerpt(post, mentions=None):
+    """Отрывок для лент: полный текст ленты из базы не читают."""
+    if post.text_version:
+        return mark_safe(post.excerpt)
+    return mark_safe(render_excerpt(post.text, mentions)[0])
+
+
+@register.filter
+def is_truncated(post):
+    if post.text_version:
+        return post.excerpt_truncated
+    return make_excerpt(post.text)[1]
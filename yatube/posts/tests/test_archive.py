@@ -0,0 +1,173 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from core.models import MediaBlob
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import ArchivedComment, ArchivedPost, Comment, Group, Post
+
+User = get_user_model()
+
+TEMP_CACHE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    CACHES={
+        **settings.CACHES,
+        'shared': {**settings.CACHES['shared'], 'LOCATION': TEMP_CACHE_DIR},
+    },
+)
+class TestArchive(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['shared'].clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.old_posts = [
+            Post.objects.create(
+                text=f'Старый пост {number}',
+                author=self.author,
+                group=self.group,
+            )
+            for number in range(3)
+        ]
+        self.old_posts[0].image = SimpleUploadedFile(
+            'small.gif', SMALL_GIF, 'image/gif'
+        )
+        self.old_posts[0].save()
+        self.comment = Comment.objects.create(
+            post=self.old_posts[0], author=self.author, text='Комментарий'
+        )
+        Post.objects.filter(
+            pk__in=[post.pk for post in self.old_posts]
+        ).update(created=timezone.now() - timedelta(days=100))
+        self.new_posts = [
+            Post.objects.create(
+                text=f'Новый пост {number}',
+                author=self.author,
+                group=self.group,
+            )
+            for number in range(settings.NUMBER_OF_PAGINATOR)
+        ]
+        self.total = len(self.old_posts) + len(self.new_posts)
+
+    def archive(self):
+        call_command('archive_posts', days=30, stdout=StringIO())
+
+    def test_old_posts_moved(self):
+        """Старые посты и комментарии переезжают в архив с теми же id."""
+        self.archive()
+        self.assertEqual(
+            set(Post.objects.all()), set(self.new_posts)
+        )
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('pk', flat=True)),
+            {post.pk for post in self.old_posts},
+        )
+        self.assertFalse(Comment.objects.exists())
+        archived = ArchivedComment.objects.get()
+        self.assertEqual(archived.pk, self.comment.pk)
+        self.assertEqual(archived.post_id, self.old_posts[0].pk)
+
+    def test_archived_post_detail(self):
+        """Архивный пост открывается по старому адресу без формы."""
+        self.archive()
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.old_posts[0].pk])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertEqual(
+            response.context['count_posts'], self.total
+        )
+        self.assertContains(response, 'Комментарий')
+        self.assertNotIn('form', response.context)
+
+    def test_pages_span_archive(self):
+        """Пагинация продолжается в архив, а первая страница его не читает."""
+        self.archive()
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        self.assertEqual(
+            response.context['page_obj'].paginator.count,
+            self.total,
+        )
+        self.assertNotIsInstance(
+            response.context['page_obj'][-1], ArchivedPost
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(any(
+            'posts_archivedpost' in query['sql']
+            for query in queries.captured_queries
+        ))
+        response = self.client.get(url, {'page': 2})
+        self.assertEqual(
+            {post.pk for post in response.context['page_obj']},
+            {post.pk for post in self.old_posts},
+        )
+        self.assertIsInstance(
+            response.context['page_obj'][0], ArchivedPost
+        )
+
+    def test_count_refreshed_after_archiving(self):
+        """Новый перенос сбрасывает закешированный размер архива."""
+        response = self.client.get(reverse('posts:profile',
+                                           args=[self.author.username]))
+        self.assertEqual(
+            response.context['count_posts'], self.total
+        )
+        self.archive()
+        Post.objects.filter(pk=self.new_posts[0].pk).update(
+            created=timezone.now() - timedelta(days=100)
+        )
+        self.archive()
+        response = self.client.get(reverse('posts:profile',
+                                           args=[self.author.username]))
+        self.assertEqual(
+            response.context['count_posts'], self.total
+        )
+
+    def test_archived_image_kept(self):
+        """Картинка архивного поста не считается мусором."""
+        self.archive()
+        image = ArchivedPost.objects.get(pk=self.old_posts[0].pk).image
+        self.assertEqual(MediaBlob.objects.get().refcount, 1)
+        call_command('gc_media', min_age=0, stdout=StringIO())
+        self.assertTrue(image.storage.exists(image.name))
+
+    def test_deleted_archived_post_releases_image(self):
+        """Удаление архивного поста снимает ссылку на его картинку."""
+        self.archive()
+        ArchivedPost.objects.get(pk=self.old_posts[0].pk).delete()
+        self.assertFalse(MediaBlob.objects.exists())
@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+
+from core.auth import USER_KEY, user_cache
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+User = get_user_model()
+
+TEMP_CACHE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(CACHES={
+    **settings.CACHES,
+    'shared': {**settings.CACHES['shared'], 'LOCATION': TEMP_CACHE_DIR},
+})
+class TestCachedAuthentication(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='author', password='old-password'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        user_cache().clear()
+        self.authorized_client = Client()
+        self.authorized_client.login(
+            username='author', password='old-password'
+        )
+        self.url = reverse('posts:post_create')
+
+    def test_user_and_session_from_cache(self):
+        """После первого запроса пользователь и сессия не читаются из базы."""
+        self.authorized_client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.authorized_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        tables = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertNotIn('"auth_user"', tables)
+        self.assertNotIn('"django_session"', tables)
+
+    def test_password_change_logs_out(self):
+        """Смена пароля сбрасывает закешированного пользователя."""
+        self.authorized_client.get(self.url)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        response = self.authorized_client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_user_edit_invalidates(self):
+        """Изменение пользователя удаляет его из кеша."""
+        self.authorized_client.get(self.url)
+        key = USER_KEY.format(self.user.pk)
+        self.assertIsNotNone(user_cache().get(key))
+        User.objects.get(pk=self.user.pk).save()
+        self.assertIsNone(user_cache().get(key))
+
+    def test_logout_clears_session(self):
+        """После выхода закешированная сессия больше не действует."""
+        self.authorized_client.get(self.url)
+        self.authorized_client.get(reverse('users:logout'))
+        response = self.authorized_client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_cache_holds_no_password(self):
+        """В кеше нет хеша пароля, а сохранение не затирает поля."""
+        self.authorized_client.get(self.url)
+        cached = user_cache().get(USER_KEY.format(self.user.pk))
+        self.assertNotIn(self.user.password, repr(cached))
+        response = self.authorized_client.get(self.url)
+        user = response.wsgi_request.user
+        self.assertEqual(user.username, 'author')
+        user.first_name = 'Имя'
+        user.save()
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.first_name, 'Имя')
+        self.assertTrue(user.check_password('old-password'))
@@ -0,0 +1,89 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..comment_queue import flush_comments
+from ..models import Comment, Post
+
+User = get_user_model()
+
+TEMP_SPOOL_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class TestCommentCount(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SPOOL_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(author=self.user, text='Пост')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.comment_url = reverse(
+            'posts:add_comment', kwargs={'post_id': self.post.id}
+        )
+
+    def comment_count(self):
+        return Post.objects.get(pk=self.post.pk).comment_count
+
+    def test_add_and_delete(self):
+        """Счётчик растёт с комментарием и уменьшается при удалении."""
+        self.authorized_client.post(self.comment_url, {'text': 'Первый'})
+        self.assertEqual(self.comment_count(), 1)
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Комментариев: 1')
+        Comment.objects.get().delete()
+        self.assertEqual(self.comment_count(), 0)
+
+    def test_stale_post_save_keeps_count(self):
+        """Сохранение поста со старым счётчиком его не затирает."""
+        stale = Post.objects.get(pk=self.post.pk)
+        self.authorized_client.post(self.comment_url, {'text': 'Первый'})
+        stale.text = 'Исправленный пост'
+        stale.save()
+        self.assertEqual(self.comment_count(), 1)
+
+    def test_deferred_fields_not_loaded_on_save(self):
+        """Отложенные поля не дочитываются и не пишутся при сохранении."""
+        post = Post.objects.defer('excerpt').get(pk=self.post.pk)
+        post.save()
+        self.assertIn('excerpt', post.get_deferred_fields())
+
+    def test_save_deleted_post_inserts_it(self):
+        """Удалённый тем временем пост сохраняется заново, как обычно."""
+        post = Post.objects.get(pk=self.post.pk)
+        Post.objects.filter(pk=post.pk).delete()
+        post.save()
+        self.assertTrue(Post.objects.filter(pk=post.pk).exists())
+
+    @override_settings(COMMENTS_WRITE_BEHIND=True, SPOOL_ROOT=TEMP_SPOOL_ROOT)
+    def test_write_behind_counts(self):
+        """Комментарии из очереди тоже попадают в счётчик."""
+        for text in ('Первый', 'Второй'):
+            self.authorized_client.post(self.comment_url, {'text': text})
+        self.assertEqual(self.comment_count(), 0)
+        flush_comments(batch_size=10)
+        self.assertEqual(self.comment_count(), 2)
+
+    def test_reconcile(self):
+        """Команда сверки возвращает счётчику верное значение."""
+        Comment.objects.create(post=self.post, author=self.user, text='1')
+        Post.objects.filter(pk=self.post.pk).update(comment_count=5)
+        out = StringIO()
+        call_command('reconcile_comment_counts', stdout=out)
+        self.assertIn('Исправлено счётчиков: 1', out.getvalue())
+        self.assertEqual(self.comment_count(), 1)
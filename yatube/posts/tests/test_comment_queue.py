@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..comment_queue import flush_comments, spool
+from ..models import Comment, Post
+
+User = get_user_model()
+
+TEMP_SPOOL_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(COMMENTS_WRITE_BEHIND=True, SPOOL_ROOT=TEMP_SPOOL_ROOT)
+class TestWriteBehindComments(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SPOOL_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(spool.root, ignore_errors=True)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}
+        )
+
+    def comment_texts(self, client):
+        response = client.get(self.detail_url)
+        return [comment.text for comment in response.context['comments']]
+
+    def test_comment_is_queued_and_flushed(self):
+        """Комментарий сначала в очереди, а после flush_comments — в базе."""
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            data={'text': 'Отложенный комментарий'},
+        )
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(
+            self.comment_texts(self.authorized_client),
+            ['Отложенный комментарий']
+        )
+        self.assertEqual(self.comment_texts(self.reader_client), [])
+
+        call_command('flush_comments', stdout=StringIO())
+        self.assertTrue(Comment.objects.filter(
+            post=self.post, author=self.user, text='Отложенный комментарий'
+        ).exists())
+        self.assertEqual(
+            self.comment_texts(self.authorized_client),
+            ['Отложенный комментарий']
+        )
+
+    def test_missing_post(self):
+        """Комментарий к несуществующему посту — 404."""
+        response = self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': 999}),
+            data={'text': 'Комментарий'},
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def add_comment(self, text):
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            data={'text': text},
+        )
+
+    def test_same_text_twice_pending(self):
+        """Два одинаковых комментария видны оба, и до записи, и после."""
+        self.add_comment('+1')
+        call_command('flush_comments', stdout=StringIO())
+        self.add_comment('+1')
+        self.assertEqual(
+            self.comment_texts(self.authorized_client), ['+1', '+1']
+        )
+
+    def test_redelivery_is_noop(self):
+        """Сообщение, доставленное повторно после сбоя, не дублируется."""
+        self.add_comment('Один раз')
+        payload, = spool.pending(self.post.id)
+        self.assertEqual(flush_comments(10), (1, 1))
+        # Сбой между записью в базу и ack вернёт то же сообщение.
+        spool.put(payload, key=self.post.id)
+        self.assertEqual(flush_comments(10), (1, 0))
+        self.assertEqual(Comment.objects.count(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_dropped_batch_does_not_stop_flush(self):
+        """Пачка, целиком отброшенная, не останавливает разбор очереди."""
+        spool.put(
+            {'post_id': 999, 'author_id': self.user.pk, 'text': 'Потерянный'},
+            key=999,
+        )
+        self.add_comment('Следующий')
+        call_command('flush_comments', batch_size=1, stdout=StringIO())
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)),
+            ['Следующий'],
+        )
+
+    def test_recover_skips_live_claims(self):
+        """recover не трогает сообщения, которые сейчас обрабатываются."""
+        self.add_comment('В работе')
+        (path, _), = spool.claim(10)
+        spool.recover(settings.SPOOL_LEASE_SECONDS)
+        self.assertEqual(spool.claim(10), [])
+        os.utime(path, (0, 0))
+        spool.recover(settings.SPOOL_LEASE_SECONDS)
+        self.assertEqual(len(spool.claim(10)), 1)
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post
+from ..rendering import make_excerpt
+
+User = get_user_model()
+
+
+@override_settings(POST_EXCERPT_LENGTH=20)
+class TestExcerpts(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.long = Post.objects.create(
+            text='Начало длинного поста, а дальше хвост', author=self.author
+        )
+        self.short = Post.objects.create(text='Короткий', author=self.author)
+
+    def test_make_excerpt(self):
+        """Текст режется по границе слова, короткий остаётся целым."""
+        self.assertEqual(
+            make_excerpt('Начало длинного поста, а дальше хвост'),
+            ('Начало длинного…', True),
+        )
+        self.assertEqual(make_excerpt(' Короткий\n'), ('Короткий', False))
+        self.assertEqual(make_excerpt('ы' * 30), ('ы' * 20 + '…', True))
+
+    def test_excerpt_saved_with_post(self):
+        """Отрывок рисуется при сохранении и обновляется при правке."""
+        self.assertEqual(self.long.excerpt, '<p>Начало длинного…</p>')
+        self.assertTrue(self.long.excerpt_truncated)
+        self.assertFalse(self.short.excerpt_truncated)
+        post = Post.objects.get(pk=self.long.pk)
+        post.text = 'Теперь коротко'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, '<p>Теперь коротко</p>')
+        self.assertFalse(post.excerpt_truncated)
+
+    def test_feeds_read_only_excerpt(self):
+        """Ленты не читают полный текст и ведут на пост за продолжением."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.author.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertFalse(any(
+                    '"posts_post"."text"' in query['sql']
+                    for query in queries.captured_queries
+                ))
+                self.assertNotContains(response, 'хвост')
+                self.assertContains(response, 'читать дальше', count=1)
+                self.assertContains(
+                    response,
+                    reverse('posts:post_detail', args=[self.long.pk]),
+                )
+
+    def test_unrendered_texts_loaded_at_once(self):
+        """Тексты неотрисованных постов ленты читаются одним запросом."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=self.author)
+            for number in range(10)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пост 9')
+        self.assertEqual(
+            sum('"posts_post"."text"' in query['sql']
+                for query in queries.captured_queries),
+            1,
+        )
+
+    def test_detail_shows_full_text(self):
+        """Страница поста показывает текст целиком."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.long.pk])
+        )
+        self.assertContains(response, 'а дальше хвост')
+        self.assertNotContains(response, 'читать дальше')
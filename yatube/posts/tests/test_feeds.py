@@ -0,0 +1,107 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..feeds import feed_cache
+from ..models import Group, Post
+
+User = get_user_model()
+
+TEMP_CACHE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(CACHES={
+    **settings.CACHES,
+    'shared': {**settings.CACHES['shared'], 'LOCATION': TEMP_CACHE_DIR},
+})
+class TestFeeds(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        feed_cache().clear()
+        self.user = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        self.post = Post.objects.create(
+            author=self.user, group=self.group, text='Первый пост'
+        )
+        self.guest_client = Client()
+
+    def test_feeds_contain_posts(self):
+        """Ленты главной, группы и автора содержат пост."""
+        urls = (
+            reverse('posts:feed_rss'),
+            reverse('posts:feed_atom'),
+            reverse('posts:group_rss', kwargs={'slug': 'test-slug'}),
+            reverse('posts:group_atom', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile_rss', kwargs={'username': 'author'}),
+            reverse('posts:profile_atom', kwargs={'username': 'author'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Первый пост')
+
+    def test_not_modified(self):
+        """Повторный опрос с ETag получает 304 без запросов к базе."""
+        url = reverse('posts:feed_rss')
+        response = self.guest_client.get(url)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_cached_until_post_changes(self):
+        """XML берётся из кеша, пока в ленте не изменится пост."""
+        url = reverse('posts:group_rss', kwargs={'slug': 'test-slug'})
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.guest_client.get(url)
+        Post.objects.create(
+            author=self.user, group=self.group, text='Второй пост'
+        )
+        response = self.guest_client.get(url)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Второй пост')
+
+    def test_moved_post_leaves_old_group_feed(self):
+        """Пост, перенесённый в другую группу, пропадает из старой ленты."""
+        url = reverse('posts:group_rss', kwargs={'slug': 'test-slug'})
+        self.guest_client.get(url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = None
+        post.save()
+        self.assertNotContains(self.guest_client.get(url), 'Первый пост')
+
+    def test_save_reads_no_author_or_group(self):
+        """Имя автора и slug группы берутся у уже загруженного поста."""
+        self.post.text = 'Исправленный пост'
+        with CaptureQueriesContext(connection) as queries:
+            self.post.save()
+        selects = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and ('"auth_user"' in query['sql']
+                 or '"posts_group"' in query['sql'])
+        ]
+        self.assertEqual(selects, [])
+
+    def test_unknown_group(self):
+        """Лента несуществующей группы — 404."""
+        response = self.guest_client.get(
+            reverse('posts:group_rss', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow
+
+User = get_user_model()
+
+
+class TestBulkFollow(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.url = reverse('posts:follow_bulk')
+
+    def post_json(self, data):
+        return self.authorized_client.post(
+            self.url, json.dumps(data), content_type='application/json'
+        )
+
+    def following(self):
+        return set(Follow.objects.filter(
+            user=self.user
+        ).values_list('author__username', flat=True))
+
+    def test_follow_and_unfollow(self):
+        """Подписки и отписки применяются списком, чужие имена — в unknown."""
+        Follow.objects.create(user=self.user, author=self.authors[2])
+        response = self.post_json({
+            'follow': ['author0', 'author1', 'author0', 'reader', 'ghost'],
+            'unfollow': ['author2'],
+        })
+        self.assertEqual(response.json()['unknown'], ['ghost'])
+        self.assertEqual(self.following(), {'author0', 'author1'})
+
+    def test_existing_follow_ignored(self):
+        """Повторная подписка не создаёт дубль."""
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        self.post_json({'follow': ['author0']})
+        self.assertEqual(Follow.objects.filter(user=self.user).count(), 1)
+
+    def test_bad_request(self):
+        """Неправильное тело запроса — 400."""
+        for data in ({'follow': 'author0'}, {'follow': [1]}, []):
+            with self.subTest(data=data):
+                self.assertEqual(self.post_json(data).status_code, 400)
+
+    def test_import_command(self):
+        """Команда применяет подписки и отписки из CSV."""
+        Follow.objects.create(user=self.authors[1], author=self.authors[2])
+        with tempfile.NamedTemporaryFile(
+                'w', suffix='.csv', dir=settings.BASE_DIR,
+                delete=False) as file:
+            file.write(
+                'reader,author0\n'
+                'reader,author1,follow\n'
+                'author1,author2,unfollow\n'
+                'author1,ghost\n'
+            )
+        self.addCleanup(os.remove, file.name)
+        out = StringIO()
+        call_command('import_follows', file.name, stdout=out)
+        self.assertEqual(self.following(), {'author0', 'author1'})
+        self.assertFalse(
+            Follow.objects.filter(user=self.authors[1]).exists()
+        )
+        self.assertIn('неизвестных пользователей: 1', out.getvalue())
@@ -127,3 +127,33 @@ class TestForm(TestCase):
                 image='posts/small.gif'
             ).exists()
         )
+
+    def test_create_post_image_limits(self):
+        """Картинка сверх лимитов отклоняется, пост не создаётся."""
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        limits = (
+            {'IMAGE_UPLOAD_MAX_PIXELS': 1},
+            {'IMAGE_UPLOAD_MAX_SIZE': 10},
+            {'IMAGE_UPLOAD_FORMATS': ('PNG',)},
+        )
+        posts_count = Post.objects.count()
+        for limit in limits:
+            with self.subTest(limit=limit), override_settings(**limit):
+                uploaded = SimpleUploadedFile(
+                    name='big.gif',
+                    content=small_gif,
+                    content_type='image/gif'
+                )
+                response = self.authorized_client.post(
+                    reverse('posts:post_create'),
+                    data={'text': 'Тестовый текст', 'image': uploaded},
+                )
+                self.assertTrue(response.context['form'].errors['image'])
+        self.assertEqual(Post.objects.count(), posts_count)
@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_SERVE_HEADER='')
+class TestMediaServing(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in ('posts/small.gif', 'cache/ab/cd/thumb.jpg', '.secret'):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(b'GIF89a')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def url(self, path):
+        return reverse('media', args=[path])
+
+    def test_worker_streams_without_header(self):
+        """Без MEDIA_SERVE_HEADER файл отдаёт сам воркер."""
+        response = self.client.get(self.url('posts/small.gif'))
+        self.assertEqual(b''.join(response.streaming_content), b'GIF89a')
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.MEDIA_CACHE_SECONDS}',
+        )
+
+    @override_settings(MEDIA_SERVE_HEADER='X-Accel-Redirect')
+    def test_accel_redirect(self):
+        """nginx получает внутренний адрес файла и пустое тело."""
+        response = self.client.get(self.url('posts/small.gif'))
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/small.gif'
+        )
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'image/gif')
+
+    @override_settings(MEDIA_SERVE_HEADER='X-Sendfile')
+    def test_sendfile(self):
+        """Apache получает путь к файлу на диске."""
+        response = self.client.get(self.url('posts/small.gif'))
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(TEMP_MEDIA_ROOT, 'posts', 'small.gif'),
+        )
+
+    def test_thumbnails_cached_longer(self):
+        """Миниатюры sorl кешируются на свой срок."""
+        response = self.client.get(self.url('cache/ab/cd/thumb.jpg'))
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.MEDIA_THUMBNAIL_CACHE_SECONDS}',
+        )
+
+    def test_not_modified(self):
+        """Неизменившийся файл не передаётся повторно."""
+        mtime = os.stat(os.path.join(TEMP_MEDIA_ROOT, 'posts', 'small.gif'))
+        response = self.client.get(
+            self.url('posts/small.gif'),
+            HTTP_IF_MODIFIED_SINCE=http_date(mtime.st_mtime),
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_paths(self):
+        """Нет файла, каталог, скрытый файл или выход из MEDIA_ROOT — 404."""
+        for path in ('posts/none.gif', 'posts', '.secret', '../manage.py'):
+            with self.subTest(path=path):
+                response = self.client.get(settings.MEDIA_URL + path)
+                self.assertEqual(response.status_code, 404)
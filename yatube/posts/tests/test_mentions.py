@@ -0,0 +1,115 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..mentions import extract_mentions
+from ..models import Comment, Notification, Post
+
+User = get_user_model()
+
+TEMP_CACHE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def username_queries(queries):
+    return [
+        query['sql'] for query in queries.captured_queries
+        if '"auth_user"."username" IN' in query['sql']
+    ]
+
+
+@override_settings(CACHES={
+    **settings.CACHES,
+    'shared': {**settings.CACHES['shared'], 'LOCATION': TEMP_CACHE_DIR},
+})
+class TestMentions(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['shared'].clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.other = User.objects.create_user(username='other')
+
+    def test_extract_mentions(self):
+        """Пунктуация и адреса почты в имя не попадают."""
+        self.assertEqual(
+            extract_mentions('@reader, a@b.ru @other. @@x @j.doe'),
+            {'reader', 'other', 'j.doe'},
+        )
+
+    def test_page_resolves_mentions_in_one_query(self):
+        """Упоминания неотрисованных постов — один запрос, потом из кеша."""
+        # bulk_create обходит pre_save: HTML рисуется при показе.
+        Post.objects.bulk_create(
+            Post(text='Привет, @reader, @other и @ghost', author=self.author)
+            for _ in range(3)
+        )
+        caches['shared'].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(len(username_queries(queries)), 1)
+        self.assertContains(
+            response,
+            f'<a href="{reverse("posts:profile", args=["reader"])}">'
+            '@reader</a>',
+            count=3,
+        )
+        self.assertNotContains(response, 'href="/profile/ghost/"')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index'))
+        self.assertEqual(username_queries(queries), [])
+
+    def test_new_user_becomes_mentionable(self):
+        """Регистрация сбрасывает закешированное «нет такого имени»."""
+        post = Post.objects.create(text='@ghost', author=self.author)
+        url = reverse('posts:post_detail', args=[post.pk])
+        self.assertNotContains(self.client.get(url), 'href="/profile/ghost/"')
+        User.objects.create_user(username='ghost')
+        call_command('rerender_text', all=True, stdout=StringIO())
+        self.assertContains(self.client.get(url), 'href="/profile/ghost/"')
+
+    def test_post_mention_notifies(self):
+        """Упомянутые получают уведомление, автор о себе — нет."""
+        post = Post.objects.create(
+            text='@reader @author @ghost', author=self.author
+        )
+        notification = Notification.objects.get()
+        self.assertEqual(notification.user, self.reader)
+        self.assertEqual(notification.post, post)
+        self.assertTrue(notification.is_mention)
+
+    def test_edit_notifies_only_new_mentions(self):
+        """Правка уведомляет только тех, кого упомянули впервые."""
+        post = Post.objects.create(text='@reader', author=self.author)
+        Notification.objects.update(is_read=True)
+        post = Post.objects.get(pk=post.pk)
+        post.text = '@reader и @other'
+        post.save()
+        self.assertEqual(
+            set(Notification.objects.values_list(
+                'user__username', 'is_read'
+            )),
+            {('reader', True), ('other', False)},
+        )
+
+    def test_comment_mention_notifies(self):
+        """Упоминание в комментарии ведёт к посту и снова его подсвечивает."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        Notification.objects.create(user=self.reader, post=post, is_read=True)
+        Comment.objects.create(post=post, author=self.other, text='@reader')
+        notification = Notification.objects.get()
+        self.assertTrue(notification.is_mention)
+        self.assertFalse(notification.is_read)
@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from core.metrics import Registry
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+TEMP_METRICS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(METRICS_DIR=TEMP_METRICS_DIR)
+class TestMetrics(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+        os.makedirs(TEMP_METRICS_DIR)
+        patcher = mock.patch('core.metrics.registry', Registry())
+        self.registry = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.guest_client = Client()
+
+    def test_request_metrics(self):
+        """Страница попадает в гистограммы времени ответа и базы."""
+        self.guest_client.get(reverse('posts:index'))
+        text = self.guest_client.get(reverse('metrics')).content.decode()
+        for line in (
+            '# TYPE yatube_request_duration_seconds histogram',
+            'yatube_request_duration_seconds_count{view="posts:index"} 1',
+            'yatube_requests_total{status="200",view="posts:index"} 1',
+            'yatube_db_duration_seconds_count{view="posts:index"} 1',
+            'yatube_template_render_seconds_count'
+            '{template="posts/index.html"} 1',
+        ):
+            self.assertIn(line, text)
+
+    def test_cache_hit_ratio(self):
+        """Чтения из кеша делятся на попадания и промахи по префиксу."""
+        cache.set('feed:1', 'лента')
+        cache.get('feed:1')
+        cache.get('feed:2')
+        cache.get('feed:3')
+        text = self.guest_client.get(reverse('metrics')).content.decode()
+        self.assertIn(
+            'yatube_cache_requests_total{prefix="feed",result="hit"} 1', text
+        )
+        self.assertIn(
+            'yatube_cache_requests_total{prefix="feed",result="miss"} 2', text
+        )
+
+    def write_snapshot(self, filename):
+        with open(os.path.join(TEMP_METRICS_DIR, filename), 'w') as file:
+            json.dump(self.registry.snapshot(), file)
+
+    def test_workers_merged(self):
+        """Снимки других воркеров складываются с текущим процессом."""
+        self.guest_client.get(reverse('posts:index'))
+        self.write_snapshot('1-1.json')
+        text = self.guest_client.get(reverse('metrics')).content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            text
+        )
+
+    def test_reused_pid_keeps_totals(self):
+        """Воркеры с тем же pid не затирают счётчики друг друга."""
+        self.guest_client.get(reverse('posts:index'))
+        pid = os.getpid()
+        self.write_snapshot(f'{pid}-1.json')
+        self.write_snapshot(f'{pid}-2.json')
+        url = reverse('metrics')
+        line = 'yatube_request_duration_seconds_count{view="posts:index"} 3'
+        self.assertIn(line, self.guest_client.get(url).content.decode())
+        self.assertEqual(
+            sorted(os.listdir(TEMP_METRICS_DIR)),
+            ['.lock', self.registry.filename, 'retired.json'],
+        )
+        self.assertIn(line, self.guest_client.get(url).content.decode())
+
+    def test_remote_scraper_forbidden(self):
+        """Метрики не отдаются с чужих адресов."""
+        response = self.guest_client.get(
+            reverse('metrics'), REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,155 @@
+import datetime
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import ArchivedPost, Group, MonthlyPostCount, Post
+
+User = get_user_model()
+
+TEMP_CACHE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def aware(year, month, day):
+    return timezone.make_aware(datetime.datetime(year, month, day, 12))
+
+
+@override_settings(CACHES={
+    **settings.CACHES,
+    'shared': {**settings.CACHES['shared'], 'LOCATION': TEMP_CACHE_DIR},
+})
+class TestMonthArchive(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['shared'].clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.january = Post.objects.create(
+            text='Январский пост', author=self.author, group=self.group
+        )
+        self.march = Post.objects.create(
+            text='Мартовский пост', author=self.author
+        )
+        # created ставится auto_now_add: даты меняются через update(),
+        # мимо сигналов, поэтому счётчики пересчитываются заново.
+        Post.objects.filter(pk=self.january.pk).update(
+            created=aware(2021, 1, 15)
+        )
+        Post.objects.filter(pk=self.march.pk).update(
+            created=aware(2021, 3, 1)
+        )
+        call_command('rebuild_month_counts', stdout=StringIO())
+
+    def counts(self, scope):
+        return {
+            (row.year, row.month): row.count
+            for row in MonthlyPostCount.objects.filter(scope=scope)
+        }
+
+    def test_rebuild(self):
+        """Пересчёт раскладывает посты по месяцам и лентам."""
+        self.assertEqual(self.counts('index'), {(2021, 1): 1, (2021, 3): 1})
+        self.assertEqual(
+            self.counts(f'group:{self.group.pk}'), {(2021, 1): 1}
+        )
+        self.assertEqual(
+            self.counts(f'author:{self.author.pk}'),
+            {(2021, 1): 1, (2021, 3): 1},
+        )
+
+    def test_counts_follow_posts(self):
+        """Создание, перенос в группу и удаление поста меняют счётчики."""
+        now = timezone.localtime()
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(self.counts('index')[now.year, now.month], 1)
+        post.group = self.group
+        post.save()
+        self.assertEqual(
+            self.counts(f'group:{self.group.pk}')[now.year, now.month], 1
+        )
+        post.delete()
+        self.assertEqual(self.counts('index')[now.year, now.month], 0)
+        self.assertEqual(
+            self.counts(f'group:{self.group.pk}')[now.year, now.month], 0
+        )
+
+    def test_delete_with_drifted_counts(self):
+        """Удаление поста и автора не падает на разошедшихся счётчиках."""
+        Post.objects.filter(pk=self.january.pk).update(
+            created=aware(2020, 6, 1)
+        )
+        Post.objects.get(pk=self.january.pk).delete()
+        self.author.delete()
+        self.assertFalse(MonthlyPostCount.objects.filter(count__lt=0))
+
+    def test_month_page(self):
+        """Страница месяца показывает только посты этого месяца."""
+        response = self.client.get(
+            reverse('posts:archive_month', args=[2021, 1])
+        )
+        self.assertEqual(list(response.context['page_obj']), [self.january])
+        response = self.client.get(
+            reverse('posts:group_archive_month', args=['group', 2021, 3])
+        )
+        self.assertEqual(list(response.context['page_obj']), [])
+        response = self.client.get(
+            reverse('posts:profile_archive_month', args=['author', 2021, 3])
+        )
+        self.assertEqual(list(response.context['page_obj']), [self.march])
+
+    def test_month_page_includes_archived(self):
+        """Архивные посты тоже попадают на страницу месяца."""
+        call_command('archive_posts', days=30, stdout=StringIO())
+        response = self.client.get(
+            reverse('posts:archive_month', args=[2021, 3])
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [self.march.pk],
+        )
+        self.assertIsInstance(
+            response.context['page_obj'][0], ArchivedPost
+        )
+
+    def test_navigation_without_post_aggregates(self):
+        """Навигация читает только таблицу счётчиков."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:archive'))
+        self.assertFalse(any(
+            'posts_post' in query['sql']
+            for query in queries.captured_queries
+        ))
+        self.assertEqual(
+            [
+                (year, [(date, count) for date, count, _ in months])
+                for year, months in response.context['navigation']
+            ],
+            [(2021, [
+                (datetime.date(2021, 3, 1), 1),
+                (datetime.date(2021, 1, 1), 1),
+            ])],
+        )
+
+    def test_invalid_month(self):
+        """Несуществующий месяц — 404."""
+        response = self.client.get(
+            reverse('posts:archive_month', args=[2021, 13])
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Follow, Notification, Post
+from ..notifications import (counter_cache, enqueue_fanout, fan_out,
+                             unread_count)
+
+User = get_user_model()
+
+TEMP_SPOOL_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_CACHE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    SPOOL_ROOT=TEMP_SPOOL_ROOT,
+    CACHES={
+        **settings.CACHES,
+        'shared': {**settings.CACHES['shared'], 'LOCATION': TEMP_CACHE_DIR},
+    },
+)
+class TestNotifications(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(3)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=reader, author=cls.author) for reader in cls.readers
+        )
+        cls.post = Post.objects.create(author=cls.author, text='Новый пост')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SPOOL_ROOT, ignore_errors=True)
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        counter_cache().clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.readers[0])
+
+    def test_fan_out_in_batches(self):
+        """Каждому подписчику — одно уведомление, повтор безопасен."""
+        fan_out(self.post.id, self.author.id, batch_size=2)
+        fan_out(self.post.id, self.author.id, batch_size=2)
+        self.assertEqual(
+            set(Notification.objects.values_list('user', flat=True)),
+            {reader.id for reader in self.readers},
+        )
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_queued_fan_out(self):
+        """Новый пост попадает к подписчикам через очередь."""
+        enqueue_fanout(self.post)
+        out = StringIO()
+        call_command('fanout_notifications', stdout=out)
+        self.assertIn('Разослано постов: 1', out.getvalue())
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_unread_count_cached(self):
+        """Счётчик читается из кеша и сбрасывается рассылкой."""
+        reader = self.readers[0]
+        self.assertEqual(unread_count(reader), 0)
+        with self.assertNumQueries(0):
+            unread_count(reader)
+        fan_out(self.post.id, self.author.id, batch_size=10)
+        self.assertEqual(unread_count(reader), 1)
+
+    def test_inbox_marks_read(self):
+        """В шапке видно число новых, открытие списка их прочитывает."""
+        fan_out(self.post.id, self.author.id, batch_size=10)
+        response = self.reader_client.get(reverse('posts:index'))
+        self.assertEqual(response.context['unread_notifications'], 1)
+        response = self.reader_client.get(reverse('posts:notifications'))
+        self.assertContains(response, 'Новый пост')
+        self.assertEqual(unread_count(self.readers[0]), 0)
+        self.assertFalse(Notification.objects.filter(
+            user=self.readers[0], is_read=False
+        ).exists())
+
+    def test_trim_old(self):
+        """Старые уведомления удаляются, свежие остаются."""
+        fan_out(self.post.id, self.author.id, batch_size=10)
+        old = Notification.objects.filter(user__in=self.readers[:2])
+        old.update(created=timezone.now() - timedelta(days=40))
+        unread_count(self.readers[0])
+        call_command('trim_notifications', batch_size=1, stdout=StringIO())
+        self.assertEqual(
+            list(Notification.objects.values_list('user', flat=True)),
+            [self.readers[2].id],
+        )
+        self.assertEqual(unread_count(self.readers[0]), 0)
@@ -0,0 +1,107 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post
+from ..post_cache import POST_KEY, post_cache
+
+User = get_user_model()
+
+TEMP_CACHE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(CACHES={
+    **settings.CACHES,
+    'shared': {**settings.CACHES['shared'], 'LOCATION': TEMP_CACHE_DIR},
+})
+class TestPostDetailCache(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['shared'].clear()
+        self.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        self.group = Group.objects.create(
+            title='Классика', slug='classic', description='Описание'
+        )
+        self.post = Post.objects.create(
+            text='Тестовый текст', author=self.author, group=self.group
+        )
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+
+    def get(self):
+        return self.client.get(self.url)
+
+    def test_hit_reads_only_comments(self):
+        """Повторный показ поста берёт пост, автора и группу из кеша."""
+        self.get()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get()
+        self.assertContains(response, 'Лев Толстой')
+        self.assertContains(response, 'Классика')
+        self.assertEqual(response.context['count_posts'], 1)
+        self.assertEqual(
+            [query['sql'] for query in queries.captured_queries
+             if 'posts_comment' not in query['sql']],
+            [],
+        )
+
+    def test_post_save_invalidates(self):
+        """Правка поста сразу видна на его странице."""
+        self.get()
+        self.post.text = 'Новый текст'
+        self.post.save()
+        self.assertContains(self.get(), 'Новый текст')
+
+    def test_group_save_invalidates(self):
+        """Переименование группы сбрасывает страницы её постов."""
+        self.get()
+        self.group.title = 'Новая группа'
+        self.group.save()
+        self.assertContains(self.get(), 'Новая группа')
+
+    def test_user_save_invalidates(self):
+        """Смена имени автора сбрасывает страницы его постов."""
+        self.get()
+        self.author.first_name = 'Алексей'
+        self.author.save()
+        self.assertContains(self.get(), 'Алексей Толстой')
+
+    def test_new_post_updates_count(self):
+        """Новый пост автора меняет число постов на старых страницах."""
+        self.get()
+        Post.objects.create(text='Второй пост', author=self.author)
+        self.assertIsNotNone(post_cache().get(POST_KEY.format(self.post.pk)))
+        self.assertEqual(self.get().context['count_posts'], 2)
+
+    def test_deleted_post_updates_count(self):
+        """Удалённый пост автора уходит из числа постов."""
+        other = Post.objects.create(text='Второй пост', author=self.author)
+        self.assertEqual(self.get().context['count_posts'], 2)
+        other.delete()
+        self.assertEqual(self.get().context['count_posts'], 1)
+
+    def test_archived_post_not_served_from_cache(self):
+        """Перенесённый в архив пост не отдаётся из кеша."""
+        self.get()
+        Post.objects.filter(pk=self.post.pk).update(
+            created=timezone.now() - timedelta(days=100)
+        )
+        call_command('archive_posts', days=30, stdout=StringIO())
+        self.assertTrue(self.get().context['archived'])
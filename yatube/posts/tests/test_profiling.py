@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+TEMP_PROFILER_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(PROFILER_SAMPLE_RATE=1, PROFILER_DIR=TEMP_PROFILER_DIR)
+class TestSamplingProfiler(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILER_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_profiles_are_merged(self):
+        """Профили пишутся по страницам и объединяются отчётом."""
+        for mode in ('cprofile', 'sampling'):
+            with self.subTest(mode=mode), override_settings(
+                    PROFILER_MODE=mode):
+                self.guest_client.get(reverse('posts:index'))
+        profiles = os.listdir(os.path.join(TEMP_PROFILER_DIR, 'posts.index'))
+        self.assertEqual(
+            sorted(os.path.splitext(name)[1] for name in profiles),
+            ['.collapsed', '.pstats']
+        )
+        call_command('profile_report', stdout=StringIO())
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(TEMP_PROFILER_DIR, '_report'))),
+            ['posts.index.collapsed', 'posts.index.pstats']
+        )
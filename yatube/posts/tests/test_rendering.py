@@ -0,0 +1,115 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..rendering import RENDERER_VERSION, render_objects, render_text
+
+User = get_user_model()
+
+
+class TestRendering(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.author = User.objects.create_user(username='author')
+
+    def test_render_text(self):
+        """Текст экранируется, разметка и ссылки добавляются рендерером."""
+        self.assertEqual(
+            render_text(
+                '**Жирный** и *курсив* <b>\n`<i>` https://ya.ru/a?b=1&c=2.'
+                '\n\n#Тег @author @ghost',
+                mentions={'author': self.author.pk},
+            ),
+            '<p><strong>Жирный</strong> и <em>курсив</em> &lt;b&gt;<br>'
+            '<code>&lt;i&gt;</code> '
+            '<a href="https://ya.ru/a?b=1&amp;c=2" rel="nofollow noopener">'
+            'https://ya.ru/a?b=1&amp;c=2</a>.</p>'
+            '<p><a href="/tags/%D1%82%D0%B5%D0%B3/">#Тег</a> '
+            '<a href="/profile/author/">@author</a> @ghost</p>',
+        )
+
+    def test_no_tag_links_in_comments(self):
+        """Теги в комментариях ссылками не становятся."""
+        self.assertEqual(render_text('#тег', tags=False), '<p>#тег</p>')
+
+    def test_html_stored_on_save(self):
+        """HTML рисуется при сохранении и только им страница и пользуется."""
+        post = Post.objects.create(text='**Пост**', author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.author, text='*Комментарий*'
+        )
+        self.assertEqual(post.text_html, '<p><strong>Пост</strong></p>')
+        self.assertEqual(post.text_version, RENDERER_VERSION)
+        self.assertEqual(comment.text_html, '<p><em>Комментарий</em></p>')
+        self.assertEqual(post.excerpt, post.text_html)
+        Post.objects.filter(pk=post.pk).update(excerpt='<p>из базы</p>')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, '<p>из базы</p>')
+
+    def test_edit_rerenders(self):
+        """Правка текста перерисовывает HTML."""
+        post = Post.objects.create(text='старый', author=self.author)
+        post = Post.objects.get(pk=post.pk)
+        post.text = 'новый'
+        post.save()
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).text_html, '<p>новый</p>'
+        )
+
+    def test_unchanged_comment_not_rerendered(self):
+        """Сохранение комментария без правки текста не рисует HTML."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.author, text='Комментарий'
+        )
+        comment = Comment.objects.get(pk=comment.pk)
+        with mock.patch('posts.signals.render_objects') as render:
+            comment.save()
+            self.assertFalse(render.called)
+            comment.text = 'Исправленный комментарий'
+            comment.save()
+            self.assertTrue(render.called)
+
+    def test_rerender_command(self):
+        """Команда перерисовывает строки старой версии рендерера."""
+        Post.objects.bulk_create(
+            Post(text=f'**{number}**', author=self.author)
+            for number in range(3)
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, '<strong>2</strong>')
+        call_command('rerender_text', batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            set(Post.objects.values_list('text_version', flat=True)),
+            {RENDERER_VERSION},
+        )
+        self.assertEqual(
+            Post.objects.get(text='**0**').text_html,
+            '<p><strong>0</strong></p>',
+        )
+
+    def test_rerender_keeps_concurrent_edit(self):
+        """Правка поста во время перерисовки не затирается старым HTML."""
+        Post.objects.bulk_create([Post(text='старый', author=self.author)])
+        post = Post.objects.get(text='старый')
+
+        def edit_while_rendering(objects, posts):
+            render_objects(objects, posts)
+            edited = Post.objects.get(pk=post.pk)
+            edited.text = 'новый'
+            edited.save()
+
+        with mock.patch(
+            'posts.management.commands.rerender_text.render_objects',
+            edit_while_rendering,
+        ):
+            call_command('rerender_text', stdout=StringIO())
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).text_html, '<p>новый</p>'
+        )
@@ -0,0 +1,65 @@
+from unittest import mock
+
+from core.middleware import STICKY_COOKIE, ReplicaRoutingMiddleware
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import resolve, reverse
+
+from ..models import Post
+
+REPLICA = {
+    **settings.DATABASES,
+    settings.REPLICA_DATABASE: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': 'replica.sqlite3',
+    },
+}
+
+
+@mock.patch.dict(settings.DATABASES, REPLICA)
+class TestReplicaRouting(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def request(self, method, url, cookies=None):
+        """Прогоняет запрос через middleware и запоминает, куда шли чтения."""
+        request = getattr(self.factory, method)(url)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(url)
+
+        def get_response(request):
+            middleware.process_view(request, None, (), {})
+            self.read_db = router.db_for_read(Post)
+            self.session_db = router.db_for_read(Session)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        return middleware(request)
+
+    def test_feed_reads_from_replica(self):
+        """Ленты читаются с реплики, сессии — из основной базы."""
+        self.request('get', reverse('posts:index'))
+        self.assertEqual(self.read_db, settings.REPLICA_DATABASE)
+        self.assertEqual(self.session_db, 'default')
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_write_makes_reads_sticky(self):
+        """После записи пользователь читает из основной базы."""
+        response = self.request(
+            'post', reverse('posts:add_comment', kwargs={'post_id': 1})
+        )
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        self.request(
+            'get',
+            reverse('posts:post_detail', kwargs={'post_id': 1}),
+            cookies={STICKY_COOKIE: '1'},
+        )
+        self.assertEqual(self.read_db, 'default')
+
+    def test_other_views_use_primary(self):
+        """Страницы вне REPLICA_VIEWS читают из основной базы."""
+        self.request('get', reverse('posts:post_create'))
+        self.assertEqual(self.read_db, 'default')
@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from core.slow_queries import fingerprint
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_LOG = os.path.join(TEMP_DIR, 'slow_queries.jsonl')
+
+
+@override_settings(SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_LOG=TEMP_LOG)
+class TestSlowQueryLog(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def tearDown(self):
+        if os.path.exists(TEMP_LOG):
+            os.remove(TEMP_LOG)
+
+    def test_fingerprint(self):
+        """Значения в отпечатке заменяются плейсхолдерами."""
+        self.assertEqual(
+            fingerprint(
+                'SELECT * FROM "posts_post" WHERE "id" IN (%s, %s)\n'
+                "  AND text = 'x' LIMIT 10"
+            ),
+            'SELECT * FROM "posts_post" WHERE "id" IN (?+) '
+            'AND text = ? LIMIT ?'
+        )
+
+    def test_queries_logged_with_plan(self):
+        """Запросы страницы попадают в журнал с планом и именем страницы."""
+        self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+        with open(TEMP_LOG, encoding='utf-8') as log:
+            entries = [json.loads(line) for line in log]
+        post_queries = [
+            entry for entry in entries
+            if 'FROM "posts_post"' in entry['fingerprint']
+        ]
+        self.assertTrue(post_queries)
+        for entry in post_queries:
+            self.assertEqual(entry['view'], 'posts:profile')
+            self.assertTrue(entry['plan'])
+
+        out = StringIO()
+        call_command('slow_queries', stdout=out)
+        self.assertIn('posts:profile', out.getvalue())
@@ -0,0 +1,79 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, override_settings
+from django.utils.functional import empty
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SOURCE_DIR = os.path.join(TEMP_DIR, 'source')
+STATIC_ROOT = os.path.join(TEMP_DIR, 'root')
+
+CSS = 'body { background: url("../img/logo.png"); }\n' * 20
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_DIRS=[SOURCE_DIR],
+)
+class TestStaticPipeline(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(SOURCE_DIR, 'css'))
+        os.makedirs(os.path.join(SOURCE_DIR, 'img'))
+        with open(os.path.join(SOURCE_DIR, 'css', 'site.css'), 'w') as file:
+            file.write(CSS)
+        with open(os.path.join(SOURCE_DIR, 'img', 'logo.png'), 'wb') as file:
+            file.write(b'\x89PNG' + bytes(range(256)) * 4)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def tearDown(self):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        # Хранилище читает манифест один раз при создании.
+        staticfiles_storage._wrapped = empty
+
+    def collect(self):
+        call_command('collectstatic', interactive=False, stdout=StringIO())
+        with open(os.path.join(STATIC_ROOT, 'staticfiles.json')) as file:
+            return json.load(file)['paths']
+
+    def test_without_manifest(self):
+        """До collectstatic ссылки ведут на исходные имена."""
+        self.assertEqual(static('css/site.css'), '/static/css/site.css')
+
+    def test_collectstatic_hashes_and_compresses(self):
+        """Имена с хешем в манифесте, текстовые файлы сжаты заранее."""
+        paths = self.collect()
+        css = paths['css/site.css']
+        png = paths['img/logo.png']
+        self.assertRegex(css, r'^css/site\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(STATIC_ROOT, css), 'rb') as file:
+            hashed = file.read()
+        self.assertIn(png.split('/')[-1].encode(), hashed)
+        with gzip.open(os.path.join(STATIC_ROOT, css + '.gz')) as file:
+            self.assertEqual(file.read(), hashed)
+        self.assertFalse(
+            os.path.exists(os.path.join(STATIC_ROOT, png + '.gz'))
+        )
+        self.assertEqual(static('css/site.css'), f'/static/{css}')
+
+    def test_nginx_config(self):
+        """Конфигурация nginx отдаёт сжатые копии и кеширует навсегда."""
+        output = StringIO()
+        call_command('nginx_config', stdout=output)
+        config = output.getvalue()
+        self.assertIn(f'alias {STATIC_ROOT}/$1;', config)
+        self.assertIn('gzip_static on;', config)
+        self.assertIn('max-age=31536000, immutable', config)
@@ -0,0 +1,149 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from core.models import MediaBlob
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TestContentAddressedStorage(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+
+    def create_post(self, name='small.gif', content=SMALL_GIF):
+        return Post.objects.create(
+            text='Тестовый текст',
+            author=self.user,
+            image=SimpleUploadedFile(name, content, 'image/gif'),
+        )
+
+    def test_duplicate_upload_shares_file(self):
+        """Одинаковые картинки хранятся одним файлом."""
+        first = self.create_post()
+        second = self.create_post(name='copy.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(
+            os.listdir(os.path.join(TEMP_MEDIA_ROOT, 'posts')), ['small.gif']
+        )
+        self.assertEqual(MediaBlob.objects.get().refcount, 2)
+
+    def test_file_removed_with_last_reference(self):
+        """Файл удаляется вместе с последней ссылкой на него."""
+        first = self.create_post()
+        second = self.create_post()
+        path = first.image.path
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_missing_file_restored_with_references(self):
+        """Пропавший файл возвращается, а ссылки на него не теряются."""
+        first = self.create_post()
+        os.remove(first.image.path)
+        second = self.create_post(name='copy.gif')
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertTrue(os.path.exists(first.image.path))
+        self.assertEqual(MediaBlob.objects.get().refcount, 2)
+        second.delete()
+        self.assertTrue(os.path.exists(first.image.path))
+
+    def test_replaced_image_released(self):
+        """При замене картинки старая больше не учитывается."""
+        post = self.create_post()
+        old_path = post.image.path
+        post = Post.objects.get(pk=post.pk)
+        post.image = SimpleUploadedFile('other.gif', SMALL_GIF + b'\x00')
+        post.save()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(MediaBlob.objects.get().name, post.image.name)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TestGarbageCollector(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='author')
+        self.post = Post.objects.create(
+            text='Тестовый текст',
+            author=user,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+        self.thumbnail = get_thumbnail(self.post.image, '960x339')
+        storage = FileSystemStorage()
+        self.orphans = [
+            storage.save('posts/orphan.gif', ContentFile(SMALL_GIF * 2)),
+            storage.save('cache/00/00/orphan.jpg', ContentFile(b'jpg')),
+        ]
+
+    def test_dry_run_keeps_files(self):
+        """Пробный прогон только считает мусор."""
+        out = StringIO()
+        call_command('gc_media', dry_run=True, min_age=0, stdout=out)
+        self.assertIn('Будет удалено оригиналов: 1', out.getvalue())
+        self.assertIn('Будет удалено миниатюр: 1', out.getvalue())
+        for name in self.orphans:
+            self.assertTrue(self.post.image.storage.exists(name))
+
+    def test_orphans_removed(self):
+        """Удаляются только файлы, на которые не ссылаются посты."""
+        call_command('gc_media', min_age=0, stdout=StringIO())
+        storage = self.post.image.storage
+        for name in self.orphans:
+            self.assertFalse(storage.exists(name))
+        self.assertTrue(storage.exists(self.post.image.name))
+        self.assertTrue(storage.exists(self.thumbnail.name))
+
+    def test_recently_acquired_file_kept(self):
+        """Старый файл, только что доставшийся новому посту, не удаляется."""
+        name = self.post.image.name
+        path = self.post.image.path
+        os.utime(path, (0, 0))
+        # Ссылка нового поста ещё не видна: пост не записан в базу.
+        Post.objects.filter(pk=self.post.pk).update(image='')
+        call_command('gc_media', stdout=StringIO())
+        self.assertTrue(os.path.exists(path))
+        MediaBlob.objects.filter(name=name).update(
+            acquired=timezone.now() - timedelta(days=1)
+        )
+        call_command('gc_media', stdout=StringIO())
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post, PostTag, Tag
+from ..tags import extract_tags
+
+User = get_user_model()
+
+
+class TestTags(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+
+    def tags(self, post):
+        return set(post.post_tags.values_list('tag__name', flat=True))
+
+    def test_extract_tags(self):
+        """Теги нормализуются, решётка внутри слова тегом не считается."""
+        self.assertEqual(
+            extract_tags('#Django и #джанго, #2024 a#b ##x #django_2'),
+            {'django', 'джанго', 'django_2'},
+        )
+
+    def test_tags_saved_with_post(self):
+        """Теги поста записываются вместе с датой поста."""
+        post = Post.objects.create(
+            text='Пост про #Python и #django', author=self.author
+        )
+        self.assertEqual(self.tags(post), {'python', 'django'})
+        self.assertEqual(
+            set(post.post_tags.values_list('created', flat=True)),
+            {post.created},
+        )
+
+    def test_retag_is_diff_based(self):
+        """Правка меняет только разошедшиеся теги."""
+        post = Post.objects.create(
+            text='#python #django', author=self.author
+        )
+        kept = PostTag.objects.get(post=post, tag__name='python')
+        post = Post.objects.get(pk=post.pk)
+        post.text = '#python #flask'
+        post.save()
+        self.assertEqual(self.tags(post), {'python', 'flask'})
+        self.assertTrue(PostTag.objects.filter(pk=kept.pk).exists())
+
+    def test_unchanged_text_skips_retag(self):
+        """Сохранение без правки текста не трогает теги."""
+        post = Post.objects.create(text='#python', author=self.author)
+        post = Post.objects.get(pk=post.pk)
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+        self.assertFalse(any(
+            'posts_posttag' in query['sql']
+            for query in queries.captured_queries
+        ))
+
+    def test_tag_page(self):
+        """Лента тега листается страницами по PostTag."""
+        for number in range(settings.NUMBER_OF_PAGINATOR + 1):
+            Post.objects.create(
+                text=f'Пост {number} #Python', author=self.author
+            )
+        Post.objects.create(text='Без тегов', author=self.author)
+        url = reverse('posts:tag_posts', args=['python'])
+        response = self.client.get(url)
+        self.assertEqual(
+            len(response.context['page_obj']), settings.NUMBER_OF_PAGINATOR
+        )
+        response = self.client.get(url, {'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertEqual(response.context['tag'], Tag.objects.get())
+        self.assertContains(response, f'<a href="{url}">#Python</a>')
+
+    def test_unknown_tag(self):
+        """Несуществующий тег — 404."""
+        response = self.client.get(reverse('posts:tag_posts', args=['nope']))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,95 @@
+from unittest import mock
+
+from core.throttling import rejection_counts
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+
+# Все запросы теста попадают в одно окно.
+@mock.patch('core.throttling.time', mock.Mock(time=lambda: 1000.0))
+@override_settings(THROTTLE_RATES={
+    'posts:add_comment': '2/m',
+    'posts:post_create': '2/m',
+    'posts:profile_follow': '2/m',
+})
+class TestThrottling(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.url = reverse(
+            'posts:add_comment', kwargs={'post_id': self.post.id}
+        )
+
+    def test_limit_exceeded(self):
+        """Сверх лимита отдаётся 429, отказ учитывается."""
+        for _ in range(2):
+            response = self.authorized_client.post(
+                self.url, data={'text': 'Комментарий'}
+            )
+            self.assertEqual(response.status_code, 302)
+        response = self.authorized_client.post(
+            self.url, data={'text': 'Комментарий'}
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(
+            rejection_counts(['posts:add_comment']),
+            {'posts:add_comment': 1}
+        )
+
+    def test_buckets_are_per_user(self):
+        """Другой пользователь с другого адреса не ограничен."""
+        for _ in range(3):
+            self.authorized_client.post(self.url, data={'text': 'Текст'})
+        other = User.objects.create_user(username='other')
+        other_client = Client(REMOTE_ADDR='10.0.0.2')
+        other_client.force_login(other)
+        response = other_client.post(self.url, data={'text': 'Текст'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_safe_methods_not_counted(self):
+        """Открытие формы не расходует лимит на публикацию."""
+        url = reverse('posts:post_create')
+        for _ in range(3):
+            self.assertEqual(self.authorized_client.get(url).status_code, 200)
+        response = self.authorized_client.post(url, data={'text': 'Пост'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_follow_link_counted(self):
+        """Подписка — ссылка, и её GET расходует лимит."""
+        User.objects.create_user(username='followed')
+        url = reverse('posts:profile_follow', args=['followed'])
+        for _ in range(2):
+            self.assertEqual(self.authorized_client.get(url).status_code, 302)
+        self.assertEqual(self.authorized_client.get(url).status_code, 429)
+
+    def test_rejected_request_spends_nothing(self):
+        """Отказ по лимиту пользователя не списывает лимит адреса."""
+        for _ in range(2):
+            self.authorized_client.post(self.url, data={'text': 'Текст'})
+        moved_client = Client(REMOTE_ADDR='10.0.0.3')
+        moved_client.force_login(self.user)
+        response = moved_client.post(self.url, data={'text': 'Текст'})
+        self.assertEqual(response.status_code, 429)
+        neighbour = User.objects.create_user(username='neighbour')
+        neighbour_client = Client(REMOTE_ADDR='10.0.0.3')
+        neighbour_client.force_login(neighbour)
+        for _ in range(2):
+            response = neighbour_client.post(
+                self.url, data={'text': 'Текст'}
+            )
+            self.assertEqual(response.status_code, 302)
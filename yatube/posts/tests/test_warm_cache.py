@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_CACHE_DIR = tempfile.mkdtemp()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    CACHES={
+        **settings.CACHES,
+        'shared': {**settings.CACHES['shared'], 'LOCATION': TEMP_CACHE_DIR},
+    },
+)
+class TestWarmCache(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='author')
+        group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        for number in range(12):
+            Post.objects.create(
+                author=user, group=group, text=f'Пост {number}'
+            )
+        Post.objects.create(
+            author=user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+
+    def test_hot_pages_warmed(self):
+        """Горячие страницы открываются, миниатюры создаются заранее."""
+        out = StringIO()
+        call_command('warm_cache', pages=3, host='testserver', stdout=out)
+        # Главная, группа и профиль — по 2 страницы и 2 ленты; 13 постов.
+        self.assertIn('Прогрето страниц: 25 из 25', out.getvalue())
+        self.assertTrue(os.listdir(os.path.join(TEMP_MEDIA_ROOT, 'cache')))
@@ -1,12 +1,53 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 urlpatterns = [
     path('', views.index, name='index'),
+    path('rss/', feeds.PostsFeed(), name='feed_rss'),
+    path('atom/', feeds.PostsAtomFeed(), name='feed_atom'),
+    path('archive/', views.month_archive, name='archive'),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.month_archive,
+        name='archive_month'
+    ),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('group/<slug:slug>/rss/', feeds.GroupFeed(), name='group_rss'),
+    path('group/<slug:slug>/atom/', feeds.GroupAtomFeed(), name='group_atom'),
+    path(
+        'group/<slug:slug>/archive/',
+        views.group_month_archive,
+        name='group_archive'
+    ),
+    path(
+        'group/<slug:slug>/archive/<int:year>/<int:month>/',
+        views.group_month_archive,
+        name='group_archive_month'
+    ),
+    path('tags/<str:name>/', views.tag_posts, name='tag_posts'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.AuthorFeed(),
+        name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.AuthorAtomFeed(),
+        name='profile_atom'
+    ),
+    path(
+        'profile/<str:username>/archive/',
+        views.profile_month_archive,
+        name='profile_archive'
+    ),
+    path(
+        'profile/<str:username>/archive/<int:year>/<int:month>/',
+        views.profile_month_archive,
+        name='profile_archive_month'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -14,6 +55,8 @@ urlpatterns = [
          views.add_comment,
          name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/bulk/', views.follow_bulk, name='follow_bulk'),
+    path('notifications/', views.notifications, name='notifications'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
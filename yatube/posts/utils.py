@@ -1,3 +1,5 @@
+from itertools import islice
+
 from django.conf import settings
 from django.core.paginator import Paginator
 
@@ -6,3 +8,12 @@ def new_paginator(obj_list, page):
     paginator = Paginator(obj_list, settings.NUMBER_OF_PAGINATOR)
     page_obj = paginator.get_page(page)
     return page_obj
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -1,63 +1,248 @@
+import json
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
 
+from .archive import PartitionedPosts, author_post_count
+from .comment_queue import enqueue_comment, pending_comments
+from .follows import apply_follows, user_ids
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from .mentions import mentioned_users
+from .models import ArchivedPost, Follow, Group, Post, Tag
+from .months import month_navigation, month_range
+from .notifications import mark_read
+from .post_cache import AUTHOR_COUNT_KEY, POST_FIELDS, POST_KEY, post_cache
+from .rendering import load_unrendered_texts, unrendered_texts
+from .tags import normalize_tag
 
 from .utils import new_paginator
 
 User = get_user_model()
 
+# Ленты показывают отрывок, полный текст и его HTML не читаются.
+FEED_DEFERRED = ('text', 'text_html')
+
 
 # @cache_page(20)
 def index(request):
-    post_list = Post.objects.select_related('author').all()
+    post_list = PartitionedPosts(
+        Post.objects.select_related('author').defer(*FEED_DEFERRED),
+        ArchivedPost.objects.select_related('author').defer(*FEED_DEFERRED),
+        'index',
+    )
     page_obj = new_paginator(post_list, request.GET.get('page'))
     context = {
         'page_obj': page_obj,
+        'mentions': mentioned_users(unrendered_texts(page_obj)),
     }
     return render(request, 'posts/index.html', context)
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = Post.objects.filter(group=group)
+    post_list = PartitionedPosts(
+        Post.objects.filter(group=group).defer(*FEED_DEFERRED),
+        ArchivedPost.objects.filter(group=group).defer(*FEED_DEFERRED),
+        f'group:{group.pk}',
+    )
     page_obj = new_paginator(post_list, request.GET.get('page'))
     context = {
         'group': group,
         'page_obj': page_obj,
+        'mentions': mentioned_users(unrendered_texts(page_obj)),
     }
     return render(request, 'posts/group_list.html', context)
 
 
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    count_posts = posts.count()
+    posts = PartitionedPosts(
+        author.posts.defer(*FEED_DEFERRED),
+        author.archived_posts.defer(*FEED_DEFERRED),
+        f'author:{author.pk}',
+    )
     page_obj = new_paginator(posts, request.GET.get('page'))
+    count_posts = page_obj.paginator.count
     is_following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user, author=author).exists()
     context = {
         'author': author,
         'count_posts': count_posts,
         'page_obj': page_obj,
-        'following': is_following
+        'following': is_following,
+        'mentions': mentioned_users(unrendered_texts(page_obj)),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def tag_posts(request, name):
+    """Лента тега: страницы читаются из PostTag по индексу (tag, -created)."""
+    tag = get_object_or_404(Tag, name=normalize_tag(name))
+    post_tags = tag.post_tags.select_related(
+        'post__author', 'post__group'
+    ).defer(*(f'post__{field}' for field in FEED_DEFERRED))
+    page_obj = new_paginator(post_tags, request.GET.get('page'))
+    context = {
+        'tag': tag,
+        'page_obj': page_obj,
+        'mentions': mentioned_users(unrendered_texts(
+            post_tag.post for post_tag in page_obj
+        )),
+    }
+    return render(request, 'posts/tag_posts.html', context)
+
+
+def month_archive(request, year=None, month=None):
+    return render_month_archive(
+        request,
+        'index',
+        Post.objects.select_related('author').defer(*FEED_DEFERRED),
+        ArchivedPost.objects.select_related('author').defer(*FEED_DEFERRED),
+        ('posts:archive', []),
+        year,
+        month,
+        {'title': 'Архив'},
+    )
+
+
+def group_month_archive(request, slug, year=None, month=None):
+    group = get_object_or_404(Group, slug=slug)
+    return render_month_archive(
+        request,
+        f'group:{group.pk}',
+        Post.objects.filter(group=group).select_related(
+            'author'
+        ).defer(*FEED_DEFERRED),
+        ArchivedPost.objects.filter(group=group).select_related(
+            'author'
+        ).defer(*FEED_DEFERRED),
+        ('posts:group_archive', [group.slug]),
+        year,
+        month,
+        {'title': f'Архив группы {group.title}', 'group': group},
+    )
+
+
+def profile_month_archive(request, username, year=None, month=None):
+    author = get_object_or_404(User, username=username)
+    return render_month_archive(
+        request,
+        f'author:{author.pk}',
+        author.posts.defer(*FEED_DEFERRED),
+        author.archived_posts.defer(*FEED_DEFERRED),
+        ('posts:profile_archive', [author.username]),
+        year,
+        month,
+        {
+            'title': f'Архив пользователя {author.get_full_name()}',
+            'author': author,
+        },
+    )
+
+
+def render_month_archive(request, scope, hot, archived, url, year, month,
+                         context):
+    """Архив ленты scope: навигация по месяцам и посты за месяц.
+
+    Навигация строится по MonthlyPostCount, посты выбираются
+    диапазоном по индексу на created. Без месяца — только навигация.
+    """
+    url_name, url_args = url
+    navigation = [
+        (nav_year, [
+            (date, count, reverse(
+                f'{url_name}_month',
+                args=[*url_args, date.year, date.month],
+            ))
+            for date, count in months
+        ])
+        for nav_year, months in month_navigation(scope)
+    ]
+    context['navigation'] = navigation
+    if month is not None:
+        if not 1 <= month <= 12 or not 1 <= year <= 9999:
+            raise Http404('Такого месяца нет')
+        start, end = month_range(year, month)
+        context['month'] = start
+        context['page_obj'] = new_paginator(
+            PartitionedPosts(
+                hot.filter(created__gte=start, created__lt=end),
+                archived.filter(created__gte=start, created__lt=end),
+            ),
+            request.GET.get('page'),
+        )
+        context['mentions'] = mentioned_users(
+            unrendered_texts(context['page_obj'])
+        )
+    return render(request, 'posts/archive.html', context)
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    count_posts = Post.objects.filter(author_id=post.author.id).count()
+    bundle = get_post_bundle(post_id)
+    if bundle is None:
+        return archived_post_detail(request, post_id)
+    post = bundle['post']
     form = CommentForm()
-    comments = post.comments.all()
+    comments = list(post.comments.select_related('author'))
+    if settings.COMMENTS_WRITE_BEHIND and request.user.is_authenticated:
+        comments += pending_comments(post, request.user, saved=comments)
     context = {
         'post': post,
-        'count_posts': count_posts,
+        'count_posts': cached_author_post_count(post.author),
         'form': form,
-        'comments': comments
+        'comments': comments,
+        'mentions': mentioned_users(unrendered_texts([post, *comments])),
+    }
+    return render(request, 'posts/post_detail.html', context)
+
+
+def get_post_bundle(post_id):
+    """Всё, что нужно post_detail, одним чтением из кеша.
+
+    Словарь с постом, у которого уже загружены автор и группа.
+    None, если поста нет в горячей таблице.
+    """
+    key = POST_KEY.format(post_id)
+    bundle = post_cache().get(key)
+    if bundle is None:
+        post = Post.objects.select_related(
+            'author', 'group'
+        ).only(*POST_FIELDS).filter(pk=post_id).first()
+        if post is None:
+            return None
+        bundle = {'post': post}
+        post_cache().set(key, bundle, settings.POST_CACHE_SECONDS)
+    return bundle
+
+
+def cached_author_post_count(author):
+    """Число постов автора для страницы поста, из кеша."""
+    key = AUTHOR_COUNT_KEY.format(author.pk)
+    count = post_cache().get(key)
+    if count is None:
+        count = author_post_count(author)
+        post_cache().set(key, count, settings.POST_CACHE_SECONDS)
+    return count
+
+
+def archived_post_detail(request, post_id):
+    """Пост из архива: только чтение, без формы комментария."""
+    post = get_object_or_404(
+        ArchivedPost.objects.select_related('author', 'group'), pk=post_id
+    )
+    comments = list(post.comments.select_related('author'))
+    context = {
+        'post': post,
+        'count_posts': cached_author_post_count(post.author),
+        'comments': comments,
+        'archived': True,
+        'mentions': mentioned_users(unrendered_texts([post, *comments])),
     }
     return render(request, 'posts/post_detail.html', context)
 
@@ -99,6 +284,8 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
+    if settings.COMMENTS_WRITE_BEHIND:
+        return add_comment_deferred(request, post_id)
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
@@ -109,16 +296,48 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def add_comment_deferred(request, post_id):
+    if not Post.objects.filter(id=post_id).exists():
+        raise Http404
+    form = CommentForm(request.POST or None)
+    if form.is_valid():
+        enqueue_comment(post_id, request.user, form.cleaned_data['text'])
+    return redirect('posts:post_detail', post_id=post_id)
+
+
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = PartitionedPosts(
+        Post.objects.filter(
+            author__following__user=request.user
+        ).defer(*FEED_DEFERRED),
+        ArchivedPost.objects.filter(
+            author__following__user=request.user
+        ).defer(*FEED_DEFERRED),
+    )
     page_obj = new_paginator(posts, request.GET.get('page'))
     context = {
         'page_obj': page_obj,
+        'mentions': mentioned_users(unrendered_texts(page_obj)),
     }
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+def notifications(request):
+    notification_list = request.user.notifications.select_related(
+        'post__author', 'post__group'
+    ).defer(*(f'post__{field}' for field in FEED_DEFERRED))
+    page_obj = new_paginator(notification_list, request.GET.get('page'))
+    # Страница строится до отметки, чтобы новые были видны выделенными.
+    page_obj.object_list = list(page_obj.object_list)
+    load_unrendered_texts(
+        notification.post for notification in page_obj.object_list
+    )
+    mark_read(request.user)
+    return render(request, 'posts/notifications.html', {'page_obj': page_obj})
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
@@ -133,3 +352,42 @@ def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
+
+
+@login_required
+@require_POST
+def follow_bulk(request):
+    """Подписки и отписки списком в JSON: {"follow": [...], "unfollow": [...]}.
+
+    Списки содержат имена авторов; отписки применяются после подписок.
+    """
+    try:
+        data = json.loads(request.body)
+        follow = data.get('follow', [])
+        unfollow = data.get('unfollow', [])
+    except (ValueError, AttributeError):
+        follow = unfollow = None
+    if not isinstance(follow, list) or not isinstance(unfollow, list):
+        follow = unfollow = None
+    names = (follow or []) + (unfollow or [])
+    if follow is None or not all(isinstance(name, str) for name in names):
+        return JsonResponse(
+            {'error': 'Ожидаются списки имён follow и unfollow.'}, status=400
+        )
+    if len(names) > settings.FOLLOW_BULK_MAX:
+        return JsonResponse(
+            {'error': f'Не больше {settings.FOLLOW_BULK_MAX} имён за раз.'},
+            status=400,
+        )
+    ids = user_ids(names)
+    followed, unfollowed = apply_follows(
+        [((request.user.id, ids[name]), True)
+         for name in follow if name in ids]
+        + [((request.user.id, ids[name]), False)
+           for name in unfollow if name in ids]
+    )
+    return JsonResponse({
+        'followed': followed,
+        'unfollowed': unfollowed,
+        'unknown': sorted(set(names) - ids.keys()),
+    })
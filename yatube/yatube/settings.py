@@ -35,13 +35,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SamplingProfilerMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.ThrottleMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
@@ -59,6 +64,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.notifications.unread_notifications',
             ],
         },
     },
@@ -73,6 +79,51 @@ DATABASES = {
     }
 }
 
+# Прагмы, которые core.db выполняет на каждом новом соединении SQLite.
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+
+# YATUBE_DB_PROFILE=production: WAL и постоянные соединения.
+DB_PROFILE = os.getenv('YATUBE_DB_PROFILE', 'default')
+if DB_PROFILE == 'production':
+    DATABASES['default'].update(
+        CONN_MAX_AGE=600,
+        PRAGMAS=SQLITE_PRODUCTION_PRAGMAS,
+    )
+
+# Реплика для чтения лент. Локально её заменяет копия базы,
+# которую обновляет manage.py sync_replica.
+REPLICA_DATABASE = 'replica'
+if os.getenv('YATUBE_DB_REPLICA'):
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('YATUBE_DB_REPLICA'),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+REPLICA_APP_LABELS = ('posts', 'auth')
+REPLICA_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:follow_index',
+    'posts:post_detail',
+)
+# После этих запросов (и любого POST) чтения идут в основную базу.
+REPLICA_STICKY_VIEWS = (
+    'posts:post_create',
+    'posts:post_edit',
+    'posts:add_comment',
+    'posts:profile_follow',
+    'posts:profile_unfollow',
+)
+REPLICA_STICKY_SECONDS = 10
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -98,8 +149,15 @@ USE_TZ = True
 
 
 STATIC_URL = '/static/'
-# STATIC_ROOT = os.path.join(BASE_DIR, 'static/')
+# collectstatic собирает сюда файлы с хешем содержимого в имени и их
+# сжатые копии; отдаёт их nginx (manage.py nginx_config).
+STATIC_ROOT = os.getenv(
+    'YATUBE_STATIC_ROOT', os.path.join(BASE_DIR, 'static_root')
+)
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
+STATICFILES_STORAGE = (
+    'core.static_storage.CompressedManifestStaticFilesStorage'
+)
 
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -116,11 +174,137 @@ NUMBER_OF_PAGINATOR = 10
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Картинки отдаёт core.views.media. В бою он только проверяет путь
+# и отвечает заголовком для веб-сервера: 'X-Accel-Redirect' для nginx
+# (internal location MEDIA_ACCEL_PREFIX, см. manage.py nginx_config)
+# или 'X-Sendfile' для Apache. Пусто — файл передаёт сам воркер.
+MEDIA_SERVE_HEADER = os.getenv('YATUBE_MEDIA_SERVE_HEADER', '')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_CACHE_SECONDS = 24 * 3600
+MEDIA_THUMBNAIL_CACHE_SECONDS = 30 * 24 * 3600
+
+# Загрузки крупнее этого размера пишутся во временный файл, а не в память.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+IMAGE_UPLOAD_MAX_SIZE = 5 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 40_000_000
+IMAGE_UPLOAD_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.LocMemCache',
+    },
+    # Общий для всех воркеров кеш на диске: сессии и пользователи.
+    # Каталог закрыт для всех, кроме приложения (core.cache).
+    'shared': {
+        'BACKEND': 'core.cache.FileBasedCache',
+        'LOCATION': os.getenv(
+            'YATUBE_SHARED_CACHE_DIR', os.path.join(BASE_DIR, 'cache')
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    },
+}
+
+# manage.py test подменяет каталог общего кеша временным.
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Сессии читаются из общего кеша и пишутся в базу сквозной записью;
+# пользователя CachedAuthenticationMiddleware берёт оттуда же.
+# Записи сбрасываются при входе, выходе и любом сохранении пользователя.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'shared'
+USER_CACHE_ALIAS = 'shared'
+USER_CACHE_SECONDS = 3600
+
+# RSS/Atom: XML строится один раз на изменение ленты и лежит в общем
+# кеше, чтобы сброс при записи поста видели все воркеры.
+FEED_ITEMS = 20
+FEED_CACHE_ALIAS = 'shared'
+FEED_CACHE_SECONDS = 24 * 3600
+
+# Миниатюры через бэкенд, который меряет время их создания.
+THUMBNAIL_BACKEND = 'core.thumbnails.MetricsThumbnailBackend'
+
+# Отложенная запись комментариев: add_comment кладёт их в очередь
+# в SPOOL_ROOT, а manage.py flush_comments пишет в базу пачками.
+COMMENTS_WRITE_BEHIND = False
+COMMENTS_FLUSH_BATCH_SIZE = 200
+SPOOL_ROOT = os.path.join(BASE_DIR, 'spool')
+# Сообщение, взятое в обработку дольше этого, считается брошенным
+# упавшим обработчиком и возвращается в очередь.
+SPOOL_LEASE_SECONDS = 300
+
+# Лимиты на запросы к страницам: «число/период» (s, m, h, d).
+# Запросы считаются отдельно для пользователя и для IP, фиксированными
+# окнами длиной в период. GET к страницам THROTTLE_FORM_VIEWS лишь
+# показывает форму и не считается; подписка же делается ссылкой, и её
+# GET учитывается.
+THROTTLE_RATES = {
+    'posts:post_create': '30/h',
+    'posts:add_comment': '10/m',
+    'posts:profile_follow': '30/m',
+    'posts:profile_unfollow': '30/m',
+    'posts:follow_bulk': '10/m',
 }
+THROTTLE_FORM_VIEWS = ('posts:post_create', 'posts:add_comment')
+# Число отказов для manage.py throttle_stats — общее для всех процессов.
+THROTTLE_STATS_CACHE_ALIAS = 'shared'
+
+# Сколько имён принимает posts:follow_bulk за один запрос.
+FOLLOW_BULK_MAX = 1000
+
+# Уведомления о новых постах: сохранение поста ставит задачу в очередь
+# SPOOL_ROOT/notifications, manage.py fanout_notifications пишет строки
+# подписчикам пачками, manage.py trim_notifications удаляет старые.
+NOTIFICATIONS_BATCH_SIZE = 500
+NOTIFICATIONS_KEEP_DAYS = 30
+NOTIFICATIONS_CACHE_ALIAS = 'shared'
+NOTIFICATIONS_COUNT_SECONDS = 600
+
+# Посты старше ARCHIVE_AFTER_DAYS manage.py archive_posts переносит
+# в архивные таблицы; ленты читают архив только на дальних страницах.
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_CACHE_ALIAS = 'shared'
+ARCHIVE_COUNT_SECONDS = 3600
+
+# Страница поста: пост с автором, группой и числом постов автора
+# лежит в общем кеше одной записью. Сбрасывается сигналами Post,
+# Group и User.
+POST_CACHE_ALIAS = 'shared'
+POST_CACHE_SECONDS = 3600
+
+# @упоминания: имена пользователей разрешаются пачкой через общий
+# кеш, включая несуществующие; сохранение пользователя обновляет запись.
+MENTIONS_CACHE_ALIAS = 'shared'
+MENTIONS_CACHE_SECONDS = 3600
+
+# Длина отрывка поста в лентах, символов; полный текст — на его странице.
+POST_EXCERPT_LENGTH = 500
+
+# Профилирование доли запросов в продакшене (0 — выключено).
+# PROFILER_MODE: 'sampling' — стеки для flame graph, 'cprofile' — .pstats.
+PROFILER_SAMPLE_RATE = float(os.getenv('YATUBE_PROFILER_SAMPLE_RATE', 0))
+PROFILER_MODE = 'sampling'
+PROFILER_INTERVAL = 0.005
+PROFILER_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# Журнал медленных запросов: порог в секундах (None — выключен);
+# переменная окружения YATUBE_SLOW_QUERY_MS задаёт его в миллисекундах.
+# manage.py slow_queries ранжирует записи по суммарному времени.
+SLOW_QUERY_THRESHOLD = (
+    float(os.getenv('YATUBE_SLOW_QUERY_MS')) / 1000
+    if os.getenv('YATUBE_SLOW_QUERY_MS') else None
+)
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.jsonl')
+
+# Метрики для Prometheus на /metrics (доступны только с METRICS_ALLOWED_IPS).
+# Каждый воркер раз в METRICS_FLUSH_INTERVAL секунд сохраняет свои
+# значения в YATUBE_METRICS_DIR; без него видны метрики одного процесса.
+METRICS_DIR = os.getenv('YATUBE_METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 5
+METRICS_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 